@@ -206,6 +206,20 @@ class Fast64Settings_Properties(bpy.types.PropertyGroup):
         description="When enabled, fast64 will default colored textures's format to RGBA even if they fit CI requirements, with the exception of textures that would not fit into TMEM otherwise",
     )
     dont_ask_color_management: bpy.props.BoolProperty(name="Don't ask to set color management properties")
+    dedup_materials: bpy.props.BoolProperty(
+        name="Merge Identical Materials",
+        description=(
+            "When enabled, materials with identical F3D settings and textures (ex. duplicated .001 materials) "
+            "are exported once per model and share their display lists"
+        ),
+    )
+    optimize_vertex_loads: bpy.props.BoolProperty(
+        name="Optimize Vertex Loads",
+        description=(
+            "When enabled, triangles are reordered for the microcode's vertex buffer size "
+            "when that reduces the number of vertices loaded. Load counts are printed to the console"
+        ),
+    )
 
     repo_settings_tab: bpy.props.BoolProperty(default=True, name="Repo Settings")
     repo_settings_path: bpy.props.StringProperty(name="Path", subtype="FILE_PATH", update=repo_path_update)
@@ -224,12 +238,16 @@ class Fast64Settings_Properties(bpy.types.PropertyGroup):
         data["autoPickTextureFormat"] = self.auto_pick_texture_format
         if self.auto_pick_texture_format:
             data["preferRGBAOverCI"] = self.prefer_rgba_over_ci
+        data["dedupMaterials"] = self.dedup_materials
+        data["optimizeVertexLoads"] = self.optimize_vertex_loads
         return data
 
     def from_repo_settings(self, data: dict):
         set_prop_if_in_data(self, "auto_repo_load_settings", data, "autoLoad")
         set_prop_if_in_data(self, "auto_pick_texture_format", data, "autoPickTextureFormat")
         set_prop_if_in_data(self, "prefer_rgba_over_ci", data, "preferRGBAOverCI")
+        set_prop_if_in_data(self, "dedup_materials", data, "dedupMaterials")
+        set_prop_if_in_data(self, "optimize_vertex_loads", data, "optimizeVertexLoads")
 
 
 class Fast64_Properties(bpy.types.PropertyGroup):
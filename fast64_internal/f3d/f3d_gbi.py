@@ -1815,6 +1815,9 @@ def _SHIFTL(value, amount, mask):
 
 MTX_SIZE = 64
 VTX_SIZE = 16
+# position, packed normal, uv, color or normal
+VTX_STRUCT = struct.Struct(">6h4B")
+VTX_O2R_STRUCT = struct.Struct("<6h4B")
 GFX_SIZE = 8
 VP_SIZE = 16  # it's 16 bytes but vanilla GBI has only one s64 for alignment, not two
 LIGHT_SIZE = 16
@@ -2101,20 +2104,27 @@ class Vtx:
         self.colorOrNormal = colorOrNormal
         self.packedNormal = packedNormal
 
-    def to_binary(self):
+    def pack_into(self, buffer, offset):
         signX = 1 if self.uv[0] >= 0 else -1
         signY = 1 if self.uv[1] >= 0 else -1
-        uv = [self.uv[0] % (signX * 2**15), self.uv[1] % (signY * 2**15)]
-        return (
-            self.position[0].to_bytes(2, "big", signed=True)
-            + self.position[1].to_bytes(2, "big", signed=True)
-            + self.position[2].to_bytes(2, "big", signed=True)
-            + self.packedNormal.to_bytes(2, "big", signed=True)
-            + uv[0].to_bytes(2, "big", signed=True)
-            + uv[1].to_bytes(2, "big", signed=True)
-            + bytearray(self.colorOrNormal)
+        VTX_STRUCT.pack_into(
+            buffer,
+            offset,
+            *self.position,
+            self.packedNormal,
+            self.uv[0] % (signX * 2**15),
+            self.uv[1] % (signY * 2**15),
+            *self.colorOrNormal,
         )
 
+    def pack_into_o2r(self, buffer, offset):
+        VTX_O2R_STRUCT.pack_into(buffer, offset, *self.position, self.packedNormal, *self.uv, *self.colorOrNormal)
+
+    def to_binary(self):
+        data = bytearray(VTX_SIZE)
+        self.pack_into(data, 0)
+        return data
+
     def to_c(self):
         def spc(x):
             return "{" + ", ".join([str(a) for a in x]) + "}"
@@ -2143,18 +2153,17 @@ class VtxList:
         return len(self.vertices) * VTX_SIZE
 
     def to_binary(self):
-        data = bytearray(0)
-        for vert in self.vertices:
-            data.extend(vert.to_binary())
+        data = bytearray(self.size())
+        for i, vert in enumerate(self.vertices):
+            vert.pack_into(data, i * VTX_SIZE)
         return data
 
     def to_c(self):
         data = CData()
         data.header = f"extern Vtx {self.name}[{len(self.vertices)}];\n"
-        data.source = f"Vtx {self.name}[{len(self.vertices)}] = {{\n"
-        for vert in self.vertices:
-            data.source += f"\t{vert.to_c()},\n"
-        data.source += "};\n\n"
+        data.sourceParts.append(f"Vtx {self.name}[{len(self.vertices)}] = {{\n")
+        data.sourceParts.extend([f"\t{vert.to_c()},\n" for vert in self.vertices])
+        data.sourceParts.append("};\n\n")
         return data
 
     def toO2R(self, folderPath: str):
@@ -2178,17 +2187,10 @@ class VtxList:
             len(self.vertices), # Count
         ))
 
-        for vert in self.vertices:
-            data.extend(struct.pack(
-                "<hhhhhhBBBB", 
-                vert.position[0], 
-                vert.position[1], 
-                vert.position[2], 
-                vert.packedNormal, 
-                vert.uv[0], 
-                vert.uv[1], 
-                *vert.colorOrNormal
-            ))
+        vertStart = len(data)
+        data.extend(bytes(self.size()))
+        for i, vert in enumerate(self.vertices):
+            vert.pack_into_o2r(data, vertStart + i * VTX_SIZE)
 
         return data
 
@@ -2200,17 +2202,22 @@ class GfxList:
         self.startAddress: int = 0
         self.tag: GfxListTag = tag
         self.DLFormat: "DLFormat" = DLFormat
+        # Binary size computed by set_addr and reused by save_binary, None outside of a binary export
+        self.binarySize: int | None = None
 
     def set_addr(self, startAddress, f3d):
         startAddress = get64bitAlignedAddr(startAddress)
         self.startAddress = startAddress
-        print(f"GfxList {self.name}: {str(startAddress)}, {str(self.size(f3d))}")
-        return startAddress, startAddress + self.size(f3d)
+        self.binarySize = self.size(f3d)
+        print(f"GfxList {self.name}: {str(startAddress)}, {str(self.binarySize)}")
+        return startAddress, startAddress + self.binarySize
 
     def save_binary(self, romfile, f3d, segments):
-        print(f"GfxList {self.name}: {str(self.startAddress)}, {str(self.size(f3d))}")
+        size = self.binarySize if self.binarySize is not None else self.size(f3d)
+        print(f"GfxList {self.name}: {str(self.startAddress)}, {str(size)}")
         romfile.seek(self.startAddress)
         romfile.write(self.to_binary(f3d, segments))
+        self.binarySize = None
 
     def size(self, f3d):
         return sum([command.size(f3d) for command in self.commands])
@@ -2238,33 +2245,28 @@ class GfxList:
         return ptrs
 
     def to_binary(self, f3d, segments):
-        data = bytearray(0)
-        for command in self.commands:
-            data.extend(command.to_binary(f3d, segments))
-        return data
+        return bytearray(0).join([command.to_binary(f3d, segments) for command in self.commands])
 
     def to_c_static(self):
-        data = f"Gfx {self.name}[] = {{\n"
-        for command in self.commands:
-            data += f"\t{command.to_c(True)},\n"
-        data += "};\n\n"
+        data = [f"Gfx {self.name}[] = {{\n"]
+        data.extend([f"\t{command.to_c(True)},\n" for command in self.commands])
+        data.append("};\n\n")
         return data
 
     def to_c_dynamic(self):
-        data = f"Gfx* {self.name}(Gfx* glistp) {{\n"
-        for command in self.commands:
-            data += f"\t{command.to_c(False)};\n"
-        data += "\treturn glistp;\n}\n\n"
+        data = [f"Gfx* {self.name}(Gfx* glistp) {{\n"]
+        data.extend([f"\t{command.to_c(False)};\n" for command in self.commands])
+        data.append("\treturn glistp;\n}\n\n")
         return data
 
     def to_c(self, f3d):
         data = CData()
         if self.DLFormat == DLFormat.Static:
             data.header = f"extern Gfx {self.name}[];\n"
-            data.source = self.to_c_static()
+            data.sourceParts = self.to_c_static()
         elif self.DLFormat == DLFormat.Dynamic:
             data.header = f"Gfx* {self.name}(Gfx* glistp);\n"
-            data.source = self.to_c_dynamic()
+            data.sourceParts = self.to_c_dynamic()
         else:
             raise PluginError("Invalid GfxList format: " + str(self.DLFormat))
         return data
@@ -2427,6 +2429,11 @@ class FModel:
         self.textures: dict[Union[FImageKey, FPaletteKey], FImage] = {}
         # dict of (material, drawLayer, FAreaData): (FMaterial, (width, height))
         self.materials: dict[Tuple[bpy.types.Material, str, FAreaData], Tuple[FMaterial, Tuple[int, int]]] = {}
+        # When merging identical materials, dict of (material content key, drawLayer, FAreaData) : key in self.materials
+        # and dict of (material, drawLayer, FAreaData) : key in self.materials it was merged into
+        self.dedup_materials: bool = bpy.context.scene.fast64.settings.dedup_materials
+        self.materialContentKeys: dict[tuple, Tuple[bpy.types.Material, str, FAreaData]] = {}
+        self.materialAliases: dict[tuple, Tuple[bpy.types.Material, str, FAreaData]] = {}
         # dict of body part name : FMesh
         self.meshes: dict[str, FMesh] = {}
         # GfxList
@@ -2508,6 +2515,15 @@ class FModel:
     def getRenderMode(self, drawLayer):
         return None
 
+    def getMaterialContentKey(self, material: bpy.types.Material):
+        """
+        Key identifying everything that goes into an exported material, used to merge identical materials.
+        Return None for materials that should never be merged.
+        """
+        if material.mat_ver <= 3:
+            return None
+        return material.f3d_mat.key()
+
     def addLODGroup(self, name, position, alwaysRenderFarthest):
         if name in self.LODGroups:
             raise PluginError("Duplicate LOD group: " + str(name))
@@ -2591,6 +2607,7 @@ class FModel:
             return None
 
     def getMaterialAndHandleShared(self, materialKey):
+        materialKey = self.materialAliases.get(materialKey, materialKey)
         # Check if material is in self
         if materialKey in self.materials:
             return self.materials[materialKey]
@@ -2743,9 +2760,9 @@ class FModel:
         texData = self.to_c_textures(texCSeparate, savePNG, texDir, gfxFormatter.texArrayBitSize)
         staticData.header += texData.header
         if texCSeparate:
-            texC.source += texData.source
+            texC.sourceParts.extend(texData.sourceParts)
         else:
-            staticData.source += texData.source
+            staticData.sourceParts.extend(texData.sourceParts)
 
         dynamicData.append(self.to_c_materials(gfxFormatter))
 
@@ -3387,18 +3404,18 @@ class FImage:
         return self.to_c_helper(self.to_c_data(texArrayBitSize), texArrayBitSize)
 
     def to_c_tex_separate(self, texPath, texArrayBitSize):
-        return self.to_c_helper('#include "' + texPath + self.filename + '"', texArrayBitSize)
+        return self.to_c_helper(['#include "' + texPath + self.filename + '"'], texArrayBitSize)
 
-    def to_c_helper(self, texData, bitsPerValue):
+    def to_c_helper(self, texData: list[str], bitsPerValue):
         code = CData()
         code.header = f"extern u{str(bitsPerValue)} {self.name}[];\n"
 
         # This is to force 8 byte alignment
         if bitsPerValue != 64:
-            code.source = f"Gfx {self.aligner_name}[] = {{gsSPEndDisplayList()}};\n"
-        code.source += f"u{str(bitsPerValue)} {self.name}[] = {{\n\t"
-        code.source += texData
-        code.source += "\n};\n\n"
+            code.sourceParts.append(f"Gfx {self.aligner_name}[] = {{gsSPEndDisplayList()}};\n")
+        code.sourceParts.append(f"u{str(bitsPerValue)} {self.name}[] = {{\n\t")
+        code.sourceParts.extend(texData)
+        code.sourceParts.append("\n};\n\n")
         return code
 
     def to_c_data(self, bitsPerValue):
@@ -3412,24 +3429,26 @@ class FImage:
         remainderCount = len(self.data) - numValues * bytesPerValue
         digits = 2 + 2 * bytesPerValue
 
-        code = "".join(
-            [
-                format(
-                    int.from_bytes(self.data[i * bytesPerValue : (i + 1) * bytesPerValue], "big"),
-                    "#0" + str(digits) + "x",
-                )
-                + ", "
-                + ("\n\t" if i % 8 == 7 else "")
-                for i in range(numValues)
-            ]
-        )
+        # One part per line of 8 values.
+        # Every value is exactly bytesPerValue bytes, so its hex string is already zero padded.
+        valuesSize = numValues * bytesPerValue
+        lineSize = 8 * bytesPerValue
+        code = []
+        for lineStart in range(0, valuesSize, lineSize):
+            lineData = self.data[lineStart : min(lineStart + lineSize, valuesSize)]
+            line = "".join(
+                [f"0x{lineData[i : i + bytesPerValue].hex()}, " for i in range(0, len(lineData), bytesPerValue)]
+            )
+            code.append(line + "\n\t" if len(lineData) == lineSize else line)
 
         if remainderCount > 0:
             start = numValues * bytesPerValue
             end = (numValues + 1) * bytesPerValue
-            code += format(
-                int.from_bytes(self.data[start:end], "big") << (8 * (bytesPerValue - remainderCount)),
-                "#0" + str(digits) + "x",
+            code.append(
+                format(
+                    int.from_bytes(self.data[start:end], "big") << (8 * (bytesPerValue - remainderCount)),
+                    "#0" + str(digits) + "x",
+                )
             )
 
         return code
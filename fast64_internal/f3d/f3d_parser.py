@@ -1,5 +1,7 @@
 from typing import Union, Optional, Callable, Any, TYPE_CHECKING
 import bmesh, bpy, mathutils, re, math, traceback
+import numpy as np
+from functools import lru_cache
 from mathutils import Vector
 from bpy.utils import register_class, unregister_class
 from .f3d_gbi import *
@@ -14,6 +16,7 @@ from .f3d_material import (
     F3DMaterialHash,
 )
 from .f3d_writer import BufferVertex, F3DVert
+from .f3d_texture_writer import getImagePixelArray
 from ..utility import *
 import ast
 from .f3d_material_helpers import F3DMaterial_UpdateLock
@@ -72,7 +75,7 @@ def getExportRotation(forwardAxisEnum, convertTransformMatrix):
     return convertTransformMatrix.to_quaternion() @ localToBlenderRotation
 
 
-def F3DtoBlenderObject(romfile, startAddress, scene, newname, transformMatrix, segmentData, shadeSmooth):
+def F3DtoBlenderObject(rom, startAddress, scene, newname, transformMatrix, segmentData, shadeSmooth):
     mesh = bpy.data.meshes.new(newname + "-mesh")
     obj = bpy.data.objects.new(newname, mesh)
     scene.collection.objects.link(obj)
@@ -81,7 +84,7 @@ def F3DtoBlenderObject(romfile, startAddress, scene, newname, transformMatrix, s
     bMesh = bmesh.new()
     bMesh.from_mesh(mesh)
 
-    parseF3DBinary(romfile, startAddress, scene, bMesh, obj, transformMatrix, newname, segmentData, [None] * 16 * 16)
+    parseF3DBinary(rom, startAddress, scene, bMesh, obj, transformMatrix, newname, segmentData, [None] * 16 * 16)
 
     # bmesh.ops.rotate(bMesh, cent = [0,0,0],
     # 	matrix = blenderToSM64Rotation,
@@ -102,11 +105,10 @@ def cmdToPositiveInt(cmd):
     return cmd if cmd >= 0 else 256 + cmd
 
 
-def parseF3DBinary(romfile, startAddress, scene, bMesh, obj, transformMatrix, groupName, segmentData, vertexBuffer):
+def parseF3DBinary(rom, startAddress, scene, bMesh, obj, transformMatrix, groupName, segmentData, vertexBuffer):
     f3d = F3D("F3D")
     currentAddress = startAddress
-    romfile.seek(currentAddress)
-    command = romfile.read(8)
+    command = rom.read(currentAddress, 8)
 
     faceSeq = bMesh.faces
     vertSeq = bMesh.verts
@@ -136,7 +138,7 @@ def parseF3DBinary(romfile, startAddress, scene, bMesh, obj, transformMatrix, gr
                 print("Ignoring triangle from unloaded vertices.")
 
         elif command[0] == cmdToPositiveInt(f3d.G_VTX):
-            interpretLoadVertices(romfile, vertexBuffer, transformMatrix, command, segmentData)
+            interpretLoadVertices(rom, vertexBuffer, transformMatrix, command, segmentData)
 
         # Note: size can usually be indicated in LoadTile / LoadBlock.
         elif command[0] == cmdToPositiveInt(f3d.G_SETTILESIZE):
@@ -146,8 +148,7 @@ def parseF3DBinary(romfile, startAddress, scene, bMesh, obj, transformMatrix, gr
             if command[1] == 0:
                 jumps.append(currentAddress)
             currentAddress = decodeSegmentedAddr(command[4:8], segmentData=segmentData)
-            romfile.seek(currentAddress)
-            command = romfile.read(8)
+            command = rom.read(currentAddress, 8)
             continue
 
         elif command[0] == cmdToPositiveInt(f3d.G_ENDDL):
@@ -163,7 +164,7 @@ def parseF3DBinary(romfile, startAddress, scene, bMesh, obj, transformMatrix, gr
 
         elif command[0] == cmdToPositiveInt(f3d.G_LOADBLOCK):
             # for now only 16bit RGBA is supported.
-            interpretLoadBlock(command, romfile, currentTextureAddr, textureSize, "RGBA", 16)
+            interpretLoadBlock(command, rom, currentTextureAddr, textureSize, "RGBA", 16)
 
         elif command[0] == cmdToPositiveInt(f3d.G_SETTILE):
             interpretSetTile(int.from_bytes(command[4:8], "big"), None)
@@ -173,8 +174,7 @@ def parseF3DBinary(romfile, startAddress, scene, bMesh, obj, transformMatrix, gr
             # print(format(command[0], '#04x') + ' at ' + hex(currentAddress))
 
         currentAddress += 8
-        romfile.seek(currentAddress)
-        command = romfile.read(8)
+        command = rom.read(currentAddress, 8)
 
     bmesh.ops.remove_doubles(bMesh, verts=vertList, dist=0.0001)
     return vertexBuffer
@@ -248,7 +248,7 @@ def interpretSetTileSize(data):
     return (width, height)
 
 
-def interpretLoadVertices(romfile, vertexBuffer, transformMatrix, command, segmentData=None):
+def interpretLoadVertices(rom, vertexBuffer, transformMatrix, command, segmentData=None):
     command = int.from_bytes(command, "big", signed=True)
 
     numVerts = bitMask(command, 52, 4) + 1
@@ -258,8 +258,7 @@ def interpretLoadVertices(romfile, vertexBuffer, transformMatrix, command, segme
 
     dataStartAddr = decodeSegmentedAddr(segmentedAddr.to_bytes(4, "big"), segmentData=segmentData)
 
-    romfile.seek(dataStartAddr)
-    data = romfile.read(dataLength)
+    data = rom.read(dataStartAddr, dataLength)
 
     for i in range(numVerts):
         vert = Vector(readVectorFromShorts(data, i * 16))
@@ -308,11 +307,11 @@ def interpretSetTImage(command, levelData):
     return decodeSegmentedAddr(segmentedAddr, levelData)
 
 
-def interpretLoadBlock(command, romfile, textureStart, textureSize, colorFormat, colorDepth):
+def interpretLoadBlock(command, rom, textureStart, textureSize, colorFormat, colorDepth):
     numTexels = ((int.from_bytes(command[6:8], "big")) >> 12) + 1
 
     # This is currently broken.
-    # createNewTextureMaterial(romfile, textureStart, textureSize, numTexels, colorFormat, colorDepth, obj)
+    # createNewTextureMaterial(rom, textureStart, textureSize, numTexels, colorFormat, colorDepth, obj)
 
 
 def printvbuf(vertexBuffer):
@@ -327,7 +326,7 @@ def createBlankMaterial(obj):
     update_preset_manual(material, bpy.context)
 
 
-def createNewTextureMaterial(romfile, textureStart, textureSize, texelCount, colorFormat, colorDepth, obj):
+def createNewTextureMaterial(rom, textureStart, textureSize, texelCount, colorFormat, colorDepth, obj):
     newMat = bpy.data.materials.new("f3d_material")
     newTex = bpy.data.textures.new("f3d_texture", "IMAGE")
     newImg = bpy.data.images.new("f3d_texture", *textureSize, True, True)
@@ -338,10 +337,9 @@ def createNewTextureMaterial(romfile, textureStart, textureSize, texelCount, col
 
     obj.data.materials.append(newMat)
 
-    romfile.seek(textureStart)
     texelSize = int(colorDepth / 8)
     dataLength = texelCount * texelSize
-    textureData = romfile.read(dataLength)
+    textureData = rom.read(textureStart, dataLength)
 
     if colorDepth != 16:
         print("Warning: Only 16bit RGBA supported, input was " + str(colorDepth) + "bit " + colorFormat)
@@ -352,11 +350,37 @@ def createNewTextureMaterial(romfile, textureStart, textureSize, texelCount, col
             newImg.pixels[n : n + 4] = read16bitRGBA(int.from_bytes(oldPixel, "big"))
 
 
+# Plain integer literals, which are most of the macro arguments, don't need to be parsed as expressions
+intLiteralRegex = re.compile(r"-?(?:0[xX][0-9a-fA-F]+|[1-9][0-9]*|0)")
+
+# (expression, F3D_VER) : value, for expressions that evaluate to a number or a string.
+# F3D only depends on its microcode, so the cache doesn't keep F3D instances alive.
+mathEvalCache: dict[tuple[str, str], Union[int, float, str]] = {}
+MATH_EVAL_CACHE_SIZE = 4096
+
+
 def math_eval(s, f3d):
     if isinstance(s, int):
         return s
 
     s = s.strip()
+    if intLiteralRegex.fullmatch(s) is not None:
+        return int(s, 0)
+
+    key = (s, f3d.F3D_VER)
+    if key in mathEvalCache:
+        return mathEvalCache[key]
+
+    value = math_eval_expression(s, f3d)
+    if isinstance(value, (int, float, str)):
+        if len(mathEvalCache) >= MATH_EVAL_CACHE_SIZE:
+            # Forget the oldest expression
+            del mathEvalCache[next(iter(mathEvalCache))]
+        mathEvalCache[key] = value
+    return value
+
+
+def math_eval_expression(s: str, f3d):
     node = ast.parse(s, mode="eval")
 
     def _eval(node):
@@ -1519,17 +1543,19 @@ class F3DContext:
         self.materialChanged = True
 
     def applyTLUT(self, image, tlut):
-        invalidIndicesDetected = False
-        for i in range(int(len(image.pixels) / 4)):
-            lutIndex = int(round(image.pixels[4 * i] * 255))
-            newValues = tlut.pixels[4 * lutIndex : 4 * (lutIndex + 1)]
-            if len(newValues) < 4:
-                # print("Invalid LUT Index " + str(lutIndex))
-                invalidIndicesDetected = True
-            else:
-                image.pixels[4 * i : 4 * (i + 1)] = newValues
-
-        if invalidIndicesDetected:
+        pixels = np.empty(len(image.pixels), dtype=np.float32)
+        image.pixels.foreach_get(pixels)
+        lutPixels = np.empty(len(tlut.pixels), dtype=np.float32)
+        tlut.pixels.foreach_get(lutPixels)
+        pixels = pixels.reshape(-1, 4)
+        lutPixels = lutPixels.reshape(-1, 4)
+
+        lutIndices = np.round(pixels[:, 0].astype(np.float64) * 255).astype(np.int64)
+        validIndices = (lutIndices >= 0) & (lutIndices < len(lutPixels))
+        pixels[validIndices] = lutPixels[lutIndices[validIndices]]
+        image.pixels.foreach_set(pixels.ravel())
+
+        if not validIndices.all():
             print("Invalid LUT Indices detected.")
 
     def getVertexDataStart(self, vertexDataParam: str, f3d: F3D):
@@ -1954,8 +1980,46 @@ def parseF3D(
         f3dContext.clearMaterial()
 
 
+# "<type> <name>[<array>] =", the start of any definition the importer can look up
+cDefinitionRegex = re.compile(r"\b([A-Za-z_]\w*)\s+([A-Za-z_]\w*)\s*(?:\[[^\[\];=]*\])?\s*=")
+
+
+class CSymbolTable:
+    """
+    Index of the definitions in C data, built with a single pass over the data.
+    Lookups only try to match at the definitions of the requested name, instead of searching the whole data.
+    """
+
+    def __init__(self, data: str):
+        self.data = data
+        # name : start offsets of its definitions (at the type), in source order
+        self.definitions: dict[str, list[int]] = {}
+        for match in cDefinitionRegex.finditer(data):
+            self.definitions.setdefault(match.group(2), []).append(match.start())
+
+    def match(self, name: str, pattern: str, flags=0):
+        """
+        Same result as re.search(pattern, data, flags), for a pattern matching a definition of name,
+        starting with its type.
+        """
+        compiledPattern = re.compile(pattern, flags)
+        for start in self.definitions.get(name, []):
+            matchResult = compiledPattern.match(self.data, start)
+            if matchResult is not None:
+                return matchResult
+        return None
+
+
+# The same data is used for every lookup of an import, so the table is only built once
+@lru_cache(maxsize=4)
+def getCSymbolTable(data: str):
+    return CSymbolTable(data)
+
+
 def parseDLData(dlData: str, dlName: str):
-    matchResult = re.search(r"Gfx\s*" + re.escape(dlName) + r"\s*\[\s*\w*\s*\]\s*=\s*\{([^\}]*)\}", dlData)
+    matchResult = getCSymbolTable(dlData).match(
+        dlName, r"Gfx\s*" + re.escape(dlName) + r"\s*\[\s*\w*\s*\]\s*=\s*\{([^\}]*)\}"
+    )
     if matchResult is None:
         raise PluginError("Cannot find display list named " + dlName)
 
@@ -1973,8 +2037,10 @@ def parseVertexData(dlData: str, vertexDataName: str, f3dContext: F3DContext):
     if vertexDataName in f3dContext.vertexData:
         return f3dContext.vertexData[vertexDataName]
 
-    matchResult = re.search(
-        r"Vtx\s*" + re.escape(vertexDataName) + r"\s*\[\s*[0-9x]*\s*\]\s*=\s*\{([^;]*);", dlData, re.DOTALL
+    matchResult = getCSymbolTable(dlData).match(
+        vertexDataName,
+        r"Vtx\s*" + re.escape(vertexDataName) + r"\s*\[\s*[0-9x]*\s*\]\s*=\s*\{([^;]*);",
+        re.DOTALL,
     )
     if matchResult is None:
         raise PluginError("Cannot find vertex list named " + vertexDataName)
@@ -2017,9 +2083,9 @@ def parseLightsData(lightsData, lightsName, f3dContext):
     # if lightsName in f3dContext.lightData:
     # 	return f3dContext.lightData[lightsName]
 
-    matchResult = re.search(
+    matchResult = getCSymbolTable(lightsData).match(
+        lightsName,
         r"Lights([0-9n])\s*" + re.escape(lightsName) + r"\s*=\s*gdSPDefLights[0-9]\s*\(([^\)]*)\)\s*;\s*",
-        lightsData,
         re.DOTALL,
     )
     if matchResult is None:
@@ -2038,42 +2104,71 @@ def parseLightsData(lightsData, lightsName, f3dContext):
     # return f3dContext.lightData[lightsName]
 
 
-def RGBA16toRGBA32(value):
-    return [((value >> 11) & 31) / 31, ((value >> 6) & 31) / 31, ((value >> 1) & 31) / 31, value & 1]
-
-
-def IA16toRGBA32(value):
-    return [((value >> 8) & 255) / 255, ((value >> 8) & 255) / 255, ((value >> 8) & 255) / 255, (value & 255) / 255]
-
-
-def IA8toRGBA32(value):
-    return [((value >> 4) & 15) / 15, ((value >> 4) & 15) / 15, ((value >> 4) & 15) / 15, (value & 15) / 15]
-
-
-def IA4toRGBA32(value):
-    return [((value >> 1) & 7) / 7, ((value >> 1) & 7) / 7, ((value >> 1) & 7) / 7, value & 1]
-
-
-def I8toRGBA32(value):
-    return [value / 255, value / 255, value / 255, 1]
-
-
-def I4toRGBA32(value):
-    return [value / 15, value / 15, value / 15, 1]
-
-
-def CI8toRGBA32(value):
-    return [value / 255, value / 255, value / 255, 1]
-
+def decodeTextureData(values: bytes, imageFormat: str, imageSize: str) -> Optional[np.ndarray]:
+    """
+    Decodes N64 texture data into flat float32 RGBA pixels, in the order they are stored.
+    CI textures are decoded as their palette index / 255, the TLUT is applied afterwards.
+    Returns None for unhandled formats.
+    """
+    data = np.frombuffer(values, dtype=np.uint8)
+    if imageSize == "G_IM_SIZ_4b":
+        # Each byte is two texels, most significant nibble first
+        data = np.stack((data >> 4, data & 15), axis=-1).ravel()
+    elif imageSize == "G_IM_SIZ_16b":
+        data = np.frombuffer(values, dtype=">u2", count=len(values) // 2)
+
+    data = data.astype(np.float64)
+    ones = np.ones_like(data)
+    if imageFormat == "G_IM_FMT_RGBA":
+        if imageSize == "G_IM_SIZ_16b":
+            value = data.astype(np.int64)
+            channels = ((value >> 11) & 31) / 31, ((value >> 6) & 31) / 31, ((value >> 1) & 31) / 31, value & 1
+        elif imageSize == "G_IM_SIZ_32b":
+            return (data / 255).astype(np.float32)
+        else:
+            print("Unhandled size for RGBA: " + str(imageSize))
+            return None
+    elif imageFormat == "G_IM_FMT_IA":
+        value = data.astype(np.int64)
+        if imageSize == "G_IM_SIZ_4b":
+            intensity = ((value >> 1) & 7) / 7
+            alpha = value & 1
+        elif imageSize == "G_IM_SIZ_8b":
+            intensity = ((value >> 4) & 15) / 15
+            alpha = (value & 15) / 15
+        elif imageSize == "G_IM_SIZ_16b":
+            intensity = ((value >> 8) & 255) / 255
+            alpha = (value & 255) / 255
+        else:
+            print("Unhandled size for IA: " + str(imageSize))
+            return None
+        channels = intensity, intensity, intensity, alpha
+    elif imageFormat == "G_IM_FMT_I":
+        if imageSize == "G_IM_SIZ_4b":
+            intensity = data / 15
+        elif imageSize == "G_IM_SIZ_8b":
+            intensity = data / 255
+        else:
+            print("Unhandled size for I: " + str(imageSize))
+            return None
+        channels = intensity, intensity, intensity, ones
+    elif imageFormat == "G_IM_FMT_CI":
+        if imageSize == "G_IM_SIZ_4b" or imageSize == "G_IM_SIZ_8b":
+            index = data / 255
+        else:
+            print("Unhandled size for CI: " + str(imageSize))
+            return None
+        channels = index, index, index, ones
+    else:
+        return None
 
-def CI4toRGBA32(value):
-    return [value / 255, value / 255, value / 255, 1]
+    return np.stack(channels, axis=-1).astype(np.float32).ravel()
 
 
 def parseTextureData(dlData, textureName, f3dContext, imageFormat, imageSize, width, isLUT, f3d):
-    matchResult = re.search(
+    matchResult = getCSymbolTable(dlData).match(
+        textureName,
         r"([A-Za-z0-9\_]+)\s*" + re.escape(textureName) + r"\s*\[\s*[0-9a-fA-Fx]*\s*\]\s*=\s*\{([^\}]*)\s*\}\s*;\s*",
-        dlData,
         re.DOTALL,
     )
     if matchResult is None:
@@ -2097,103 +2192,63 @@ def parseTextureData(dlData, textureName, f3dContext, imageFormat, imageSize, wi
 
         # Blender UV origin is bottom right, while N64 is top right, so we must flip LUT since we read it as data
         if isLUT:
-            flippedValues = image.pixels[:]
-            width, height = image.size
-            for j in range(height):
-                image.pixels[width * j * 4 : width * (j + 1) * 4] = flippedValues[
-                    width * (height - (j + 1)) * 4 : width * (height - j) * 4
-                ]
+            image.pixels.foreach_set(getImagePixelArray(image).ravel())
 
         loadedFromImageFile = True
     else:
-        values = [value.strip() for value in data.split(",") if value.strip() != ""]
-        newValues = []
-        for value in values:
-            intValue = math_eval(value, f3d)
-            if valueSize == "u8" or valueSize == "s8" or valueSize == "char" or valueSize == "Texture":
-                size = 1
-            elif valueSize == "u16" or valueSize == "s16" or valueSize == "short":
-                size = 2
-            elif valueSize == "u32" or valueSize == "s32" or valueSize == "int":
-                size = 4
-            else:
-                size = 8
-            newValues.extend(int.to_bytes(intValue, size, "big")[:])
-        values = newValues
+        if valueSize == "u8" or valueSize == "s8" or valueSize == "char" or valueSize == "Texture":
+            size = 1
+        elif valueSize == "u16" or valueSize == "s16" or valueSize == "short":
+            size = 2
+        elif valueSize == "u32" or valueSize == "s32" or valueSize == "int":
+            size = 4
+        else:
+            size = 8
+        values = bytearray()
+        for value in data.split(","):
+            value = value.strip()
+            if value != "":
+                values += int.to_bytes(math_eval(value, f3d), size, "big")
 
         if width == 0:
             width = 16
         height = int(ceil(len(values) / (width * int(imageSize[9:-1]) / 8)))
         # print("Texture: " + str(len(values)) + ", width = " + str(width) + ", height = " + str(height))
         image = bpy.data.images.new(textureName, width, height, alpha=True)
-        if imageFormat == "G_IM_FMT_RGBA":
-            if imageSize == "G_IM_SIZ_16b":
-                for i in range(int(len(values) / 2)):
-                    image.pixels[4 * i : 4 * (i + 1)] = RGBA16toRGBA32(
-                        int.from_bytes(values[2 * i : 2 * (i + 1)], "big")
-                    )
-            elif imageSize == "G_IM_SIZ_32b":
-                image.pixels[:] = values
-            else:
-                print("Unhandled size for RGBA: " + str(imageSize))
-        elif imageFormat == "G_IM_FMT_IA":
-            if imageSize == "G_IM_SIZ_4b":
-                for i in range(len(values)):
-                    image.pixels[8 * i : 8 * i + 4] = IA4toRGBA32((values[i] >> 4) & 15)
-                    image.pixels[8 * i + 4 : 8 * i + 8] = IA4toRGBA32(values[i] & 15)
-            elif imageSize == "G_IM_SIZ_8b":
-                for i in range(len(values)):
-                    image.pixels[4 * i : 4 * (i + 1)] = IA8toRGBA32(values[i])
-            elif imageSize == "G_IM_SIZ_16b":
-                for i in range(int(len(values) / 2)):
-                    image.pixels[4 * i : 4 * (i + 1)] = IA16toRGBA32(int.from_bytes(values[2 * i : 2 * (i + 1)], "big"))
-            else:
-                print("Unhandled size for IA: " + str(imageSize))
-        elif imageFormat == "G_IM_FMT_I":
-            if imageSize == "G_IM_SIZ_4b":
-                for i in range(len(values)):
-                    image.pixels[8 * i : 8 * i + 4] = I4toRGBA32((values[i] >> 4) & 15)
-                    image.pixels[8 * i + 4 : 8 * i + 8] = I4toRGBA32(values[i] & 15)
-            elif imageSize == "G_IM_SIZ_8b":
-                for i in range(len(values)):
-                    image.pixels[4 * i : 4 * (i + 1)] = I8toRGBA32(values[i])
-            else:
-                print("Unhandled size for I: " + str(imageSize))
-        elif imageFormat == "G_IM_FMT_CI":
-            if imageSize == "G_IM_SIZ_4b":
-                for i in range(len(values)):
-                    image.pixels[8 * i : 8 * i + 4] = CI4toRGBA32((values[i] >> 4) & 15)
-                    image.pixels[8 * i + 4 : 8 * i + 8] = CI4toRGBA32(values[i] & 15)
-            elif imageSize == "G_IM_SIZ_8b":
-                for i in range(len(values)):
-                    image.pixels[4 * i : 4 * (i + 1)] = CI8toRGBA32(values[i])
-            else:
-                print("Unhandled size for CI: " + str(imageSize))
+
+        pixels = np.empty(width * height * 4, dtype=np.float32)
+        image.pixels.foreach_get(pixels)
+        decodedPixels = decodeTextureData(values, imageFormat, imageSize)
+        if decodedPixels is not None:
+            decodedCount = min(len(decodedPixels), len(pixels))
+            pixels[:decodedCount] = decodedPixels[:decodedCount]
 
         # Blender UV origin is bottom right, while N64 is top right, so we must flip non LUT
         if not isLUT:
-            flippedValues = image.pixels[:]
-            for j in range(height):
-                image.pixels[width * j * 4 : width * (j + 1) * 4] = flippedValues[
-                    width * (height - (j + 1)) * 4 : width * (height - j) * 4
-                ]
+            pixels = pixels.reshape(height, width * 4)[::-1].ravel()
+        image.pixels.foreach_set(pixels)
 
     return image, loadedFromImageFile
 
 
+# Only parentheses change the state of parseMacroList, and only parentheses and commas the state of parseMacroArgs
+macroParenthesesRegex = re.compile(r"[()]")
+macroArgsRegex = re.compile(r"[(),]")
+
+
 def parseMacroList(data: str):
-    end = 0
     start = 0
     isCommand = True
     commands: "list[ParsedMacro]" = []
     parenthesesCount = 0
 
     command = None
-    while end < len(data) - 1:
-        end += 1
+    # The first character is skipped, like it always has been
+    for match in macroParenthesesRegex.finditer(data, 1):
+        end = match.start()
         if data[end] == "(":
             parenthesesCount += 1
-        elif data[end] == ")":
+        else:
             parenthesesCount -= 1
 
         if isCommand and parenthesesCount > 0:
@@ -2214,23 +2269,34 @@ def parseMacroList(data: str):
 
 
 def parseMacroArgs(data: str):
+    if "(" not in data and ")" not in data:
+        if len(data) == 0:
+            return []
+        params = data.split(",")
+        # The last parameter ends at the end of the data, including a trailing comma
+        if data[-1] == ",":
+            params[-2:] = [params[-2] + ","]
+        return ["".join(param.split()) for param in params]
+
     start = 0
     params: "list[str]" = []
     parenthesesCount = 0
+    last = len(data) - 1
 
-    for end in range(len(data)):
+    for match in macroArgsRegex.finditer(data):
+        end = match.start()
         if data[end] == "(":
             parenthesesCount += 1
         elif data[end] == ")":
             parenthesesCount -= 1
-
-        if (data[end] == "," or end == len(data) - 1) and parenthesesCount == 0:
-            if end == len(data) - 1:
-                end += 1
-            param = "".join(data[start:end].split())
-            params.append(param)
+        elif parenthesesCount == 0 and end != last:
+            params.append("".join(data[start:end].split()))
             start = end + 1
 
+    # The last parameter ends at the end of the data, including a trailing comma
+    if last >= 0 and parenthesesCount == 0:
+        params.append("".join(data[start:].split()))
+
     return params
 
 
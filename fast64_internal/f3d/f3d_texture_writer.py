@@ -1,6 +1,7 @@
 from typing import Union, Optional
 from dataclasses import dataclass, field
 import bpy
+import numpy as np
 from math import ceil, floor
 
 from .f3d_enums import *
@@ -1094,62 +1095,101 @@ def savePaletteLoad(
 # Functions for converting and writing texture and palette data
 
 
-def extractConvertCIPixel(image, pixels, i, j, palFormat):
-    color = [1, 1, 1, 1]
-    for field in range(image.channels):
-        color[field] = pixels[(j * image.size[0] + i) * image.channels + field]
+def getImagePixelArray(image: bpy.types.Image) -> np.ndarray:
+    """
+    Returns the image pixels as a float32 (height, width, channels) array, first row at the top.
+    """
+    width, height = image.size
+    pixels = np.empty(width * height * image.channels, dtype=np.float32)
+    image.pixels.foreach_get(pixels)
+    # N64 is -Y, Blender is +Y
+    return pixels.reshape(height, width, image.channels)[::-1]
+
+
+def quantizeArray(values: np.ndarray, maxValue: int) -> np.ndarray:
+    """
+    Same as int(round(value * maxValue)) per element (round half to even, like python's round).
+    """
+    return np.round(values.astype(np.float64) * maxValue).astype(np.int64)
+
+
+def packNibbleArray(values: np.ndarray) -> bytearray:
+    """
+    Packs pairs of 4 bit values into bytes, high nibble first. An odd last value gets a zero low nibble.
+    """
+    values = values.ravel().astype(np.uint8)
+    if len(values) % 2 == 1:
+        values = np.append(values, np.uint8(0))
+    return bytearray(((values[0::2] << 4) | values[1::2]).tobytes())
+
+
+def getRGBA16Array(pixels: np.ndarray) -> np.ndarray:
+    """
+    Array version of getRGBA16Tuple over the last axis.
+    """
+    return (
+        ((quantizeArray(pixels[..., 0], 0x1F) & 0x1F) << 11)
+        | ((quantizeArray(pixels[..., 1], 0x1F) & 0x1F) << 6)
+        | ((quantizeArray(pixels[..., 2], 0x1F) & 0x1F) << 1)
+        | (pixels[..., 3] > 0.5)
+    )
+
+
+def getIA16Array(pixels: np.ndarray) -> np.ndarray:
+    """
+    Array version of getIA16Tuple over the last axis.
+    """
+    alpha = (pixels[..., 3].astype(np.float64) * 0xFF).astype(np.int64)
+    return (quantizeArray(colorToLuminanceArray(pixels), 0xFF) << 8) | alpha
+
+
+def getCIPixelColorArray(image: bpy.types.Image, palFormat: str) -> np.ndarray:
+    """
+    Returns the palette color of every pixel (first row at the top) as a flat int64 array,
+    with the same values as getRGBA16Tuple / getIA16Tuple.
+    """
+    pixels = getImagePixelArray(image)
+    if image.channels < 4:
+        # missing channels default to 1
+        padding = np.ones(pixels.shape[:2] + (4 - image.channels,), dtype=np.float32)
+        pixels = np.concatenate((pixels, padding), axis=-1)
     if palFormat == "RGBA16":
-        pixelColor = getRGBA16Tuple(color)
+        colors = getRGBA16Array(pixels)
     elif palFormat == "IA16":
-        pixelColor = getIA16Tuple(color)
+        colors = getIA16Array(pixels)
     else:
         raise PluginError("Internal error, palette format is " + palFormat)
-    return pixelColor
+    return colors.ravel()
 
 
 def getColorsUsedInImage(image, palFormat):
-    palette = []
-    # N64 is -Y, Blender is +Y
-    pixels = image.pixels[:]
-    for j in reversed(range(image.size[1])):
-        for i in range(image.size[0]):
-            pixelColor = extractConvertCIPixel(image, pixels, i, j, palFormat)
-            if pixelColor not in palette:
-                palette.append(pixelColor)
-    return palette
+    colors, firstIndices = np.unique(getCIPixelColorArray(image, palFormat), return_index=True)
+    # Keep colors in order of first appearance
+    return colors[np.argsort(firstIndices)].tolist()
 
 
 def mergePalettes(pal0, pal1):
     palette = [c for c in pal0]
+    paletteColors = set(palette)
     for c in pal1:
-        if c not in palette:
+        if c not in paletteColors:
             palette.append(c)
+            paletteColors.add(c)
     return palette
 
 
 def getColorIndicesOfTexture(image, palette, palFormat):
-    texture = []
-    # N64 is -Y, Blender is +Y
-    pixels = image.pixels[:]
-    for j in reversed(range(image.size[1])):
-        for i in range(image.size[0]):
-            pixelColor = extractConvertCIPixel(image, pixels, i, j, palFormat)
-            if pixelColor not in palette:
-                raise PluginError(f"Bug: {image.name} palette len {len(palette)} missing CI")
-            texture.append(palette.index(pixelColor))
-    return texture
+    paletteIndices = {}
+    for index, color in enumerate(palette):
+        paletteIndices.setdefault(color, index)
 
-
-def compactNibbleArray(texture, width, height):
-    nibbleData = bytearray(0)
-    dataSize = int(width * height / 2)
-
-    nibbleData = [((texture[i * 2] & 0xF) << 4) | (texture[i * 2 + 1] & 0xF) for i in range(dataSize)]
-
-    if (width * height) % 2 == 1:
-        nibbleData.append((texture[-1] & 0xF) << 4)
-
-    return bytearray(nibbleData)
+    colors, inverse = np.unique(getCIPixelColorArray(image, palFormat), return_inverse=True)
+    colorIndices = []
+    for color in colors.tolist():
+        if color not in paletteIndices:
+            raise PluginError(f"Bug: {image.name} palette len {len(palette)} missing CI")
+        colorIndices.append(paletteIndices[color])
+    return np.array(colorIndices, dtype=np.int64)[inverse.ravel()]
 
 
 def writePaletteData(fPalette: FImage, palette: list[int]):
@@ -1173,9 +1213,9 @@ def writeCITextureData(
     texture = getColorIndicesOfTexture(image, palette, palFmt)
 
     if texFmt == "CI4":
-        fImage.data = compactNibbleArray(texture, image.size[0], image.size[1])
+        fImage.data = packNibbleArray(texture & 0xF)
     else:
-        fImage.data = bytearray(texture)
+        fImage.data = bytearray(texture.tolist())
     fImage.converted = True
 
 
@@ -1185,45 +1225,12 @@ def writeNonCITextureData(image: bpy.types.Image, fImage: FImage, texFmt: str):
     fmt = texFormatOf[texFmt]
     bitSize = texBitSizeF3D[texFmt]
 
-    pixels = image.pixels[:]
+    pixels = getImagePixelArray(image)
     if fmt == "G_IM_FMT_RGBA":
         if bitSize == "G_IM_SIZ_16b":
-            fImage.data = bytearray(
-                [
-                    byteVal
-                    for doubleByte in [
-                        (
-                            (
-                                ((int(round(pixels[(j * image.size[0] + i) * image.channels + 0] * 0x1F)) & 0x1F) << 3)
-                                | (
-                                    (int(round(pixels[(j * image.size[0] + i) * image.channels + 1] * 0x1F)) & 0x1F)
-                                    >> 2
-                                )
-                            ),
-                            (
-                                ((int(round(pixels[(j * image.size[0] + i) * image.channels + 1] * 0x1F)) & 0x03) << 6)
-                                | (
-                                    (int(round(pixels[(j * image.size[0] + i) * image.channels + 2] * 0x1F)) & 0x1F)
-                                    << 1
-                                )
-                                | (1 if pixels[(j * image.size[0] + i) * image.channels + 3] > 0.5 else 0)
-                            ),
-                        )
-                        for j in reversed(range(image.size[1]))
-                        for i in range(image.size[0])
-                    ]
-                    for byteVal in doubleByte
-                ]
-            )
+            fImage.data = bytearray(getRGBA16Array(pixels).astype(">u2").tobytes())
         elif bitSize == "G_IM_SIZ_32b":
-            fImage.data = bytearray(
-                [
-                    int(round(pixels[(j * image.size[0] + i) * image.channels + field] * 0xFF)) & 0xFF
-                    for j in reversed(range(image.size[1]))
-                    for i in range(image.size[0])
-                    for field in range(image.channels)
-                ]
-            )
+            fImage.data = bytearray((quantizeArray(pixels, 0xFF) & 0xFF).astype(np.uint8).tobytes())
         else:
             raise PluginError("Invalid combo: " + fmt + ", " + bitSize)
 
@@ -1238,136 +1245,27 @@ def writeNonCITextureData(image: bpy.types.Image, fImage: FImage, texFmt: str):
         raise PluginError("Internal error, writeNonCITextureData called for CI image.")
 
     elif fmt == "G_IM_FMT_IA":
+        luminance = colorToLuminanceArray(pixels)
+        alpha = pixels[..., 3]
         if bitSize == "G_IM_SIZ_4b":
-            fImage.data = bytearray(
-                [
-                    (
-                        (
-                            int(
-                                round(
-                                    colorToLuminance(
-                                        pixels[
-                                            (j * image.size[0] + i)
-                                            * image.channels : (j * image.size[0] + i)
-                                            * image.channels
-                                            + 3
-                                        ]
-                                    )
-                                    * 0x7
-                                )
-                            )
-                            & 0x7
-                        )
-                        << 1
-                    )
-                    | (1 if pixels[(j * image.size[0] + i) * image.channels + 3] > 0.5 else 0)
-                    for j in reversed(range(image.size[1]))
-                    for i in range(image.size[0])
-                ]
-            )
+            fImage.data = packNibbleArray(((quantizeArray(luminance, 0x7) & 0x7) << 1) | (alpha > 0.5))
         elif bitSize == "G_IM_SIZ_8b":
-            fImage.data = bytearray(
-                [
-                    (
-                        (
-                            int(
-                                round(
-                                    colorToLuminance(
-                                        pixels[
-                                            (j * image.size[0] + i)
-                                            * image.channels : (j * image.size[0] + i)
-                                            * image.channels
-                                            + 3
-                                        ]
-                                    )
-                                    * 0xF
-                                )
-                            )
-                            & 0xF
-                        )
-                        << 4
-                    )
-                    | (int(round(pixels[(j * image.size[0] + i) * image.channels + 3] * 0xF)) & 0xF)
-                    for j in reversed(range(image.size[1]))
-                    for i in range(image.size[0])
-                ]
-            )
+            texels = ((quantizeArray(luminance, 0xF) & 0xF) << 4) | (quantizeArray(alpha, 0xF) & 0xF)
+            fImage.data = bytearray(texels.astype(np.uint8).tobytes())
         elif bitSize == "G_IM_SIZ_16b":
-            fImage.data = bytearray(
-                [
-                    byteVal
-                    for doubleByte in [
-                        (
-                            int(
-                                round(
-                                    colorToLuminance(
-                                        pixels[
-                                            (j * image.size[0] + i)
-                                            * image.channels : (j * image.size[0] + i)
-                                            * image.channels
-                                            + 3
-                                        ]
-                                    )
-                                    * 0xFF
-                                )
-                            )
-                            & 0xFF,
-                            int(round(pixels[(j * image.size[0] + i) * image.channels + 3] * 0xFF)) & 0xFF,
-                        )
-                        for j in reversed(range(image.size[1]))
-                        for i in range(image.size[0])
-                    ]
-                    for byteVal in doubleByte
-                ]
-            )
+            texels = np.stack((quantizeArray(luminance, 0xFF) & 0xFF, quantizeArray(alpha, 0xFF) & 0xFF), axis=-1)
+            fImage.data = bytearray(texels.astype(np.uint8).tobytes())
         else:
             raise PluginError("Invalid combo: " + fmt + ", " + bitSize)
     elif fmt == "G_IM_FMT_I":
+        luminance = colorToLuminanceArray(pixels)
         if bitSize == "G_IM_SIZ_4b":
-            fImage.data = bytearray(
-                [
-                    int(
-                        round(
-                            colorToLuminance(
-                                pixels[
-                                    (j * image.size[0] + i) * image.channels : (j * image.size[0] + i) * image.channels
-                                    + 3
-                                ]
-                            )
-                            * 0xF
-                        )
-                    )
-                    & 0xF
-                    for j in reversed(range(image.size[1]))
-                    for i in range(image.size[0])
-                ]
-            )
+            fImage.data = packNibbleArray(quantizeArray(luminance, 0xF) & 0xF)
         elif bitSize == "G_IM_SIZ_8b":
-            fImage.data = bytearray(
-                [
-                    int(
-                        round(
-                            colorToLuminance(
-                                pixels[
-                                    (j * image.size[0] + i) * image.channels : (j * image.size[0] + i) * image.channels
-                                    + 3
-                                ]
-                            )
-                            * 0xFF
-                        )
-                    )
-                    & 0xFF
-                    for j in reversed(range(image.size[1]))
-                    for i in range(image.size[0])
-                ]
-            )
+            fImage.data = bytearray((quantizeArray(luminance, 0xFF) & 0xFF).astype(np.uint8).tobytes())
         else:
             raise PluginError("Invalid combo: " + fmt + ", " + bitSize)
     else:
         raise PluginError("Invalid image format " + fmt)
 
-    # We stored 4bit values in byte arrays, now to convert
-    if bitSize == "G_IM_SIZ_4b":
-        fImage.data = compactNibbleArray(fImage.data, image.size[0], image.size[1])
-
     fImage.converted = True
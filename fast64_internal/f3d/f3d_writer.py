@@ -1,7 +1,8 @@
 from typing import Union, Optional, Callable, Any, List
 from dataclasses import dataclass
 import functools
-import bpy, mathutils, os, re, copy, math
+import bpy, mathutils, os, re, math, heapq
+import numpy as np
 from mathutils import Vector
 from math import ceil
 from bpy.utils import register_class, unregister_class
@@ -67,7 +68,7 @@ class MeshInfo:
     def __init__(self):
         self.vert = {}  # all faces connected to a vert
         self.edge = {}  # all faces connected to an edge
-        self.f3dVert = {}  # f3d vertex of a given loop
+        self.f3dVertId = None  # per loop id of its f3d vertex, equal ids mean equal f3d vertices
         self.edgeValid = {}  # bool given two faces
         self.validNeighbors = {}  # all neighbors of a face with a valid connecting edge
         self.texDimensions = {}  # texture dimensions for each material
@@ -147,7 +148,6 @@ def getInfoDict_impl(obj: bpy.types.Object):
 
     vertDict = infoDict.vert
     edgeDict = infoDict.edge
-    f3dVertDict = infoDict.f3dVert
     edgeValidDict = infoDict.edgeValid
     validNeighborDict = infoDict.validNeighbors
 
@@ -161,47 +161,167 @@ def getInfoDict_impl(obj: bpy.types.Object):
                 uv_data = uv_layer.data
         if uv_data is None:
             raise PluginError("Object '" + get_original_name(obj) + "' does not have a UV layer named 'UVMap.'")
-    for face in mesh.loop_triangles:
-        validNeighborDict[face] = []
-        material = obj.material_slots[face.material_index].material
-        if material is None:
-            raise PluginError(
-                f"There are some faces on your mesh object {get_original_name(obj)}"
-                " that are assigned to an empty material slot."
-            )
-        for vertIndex in face.vertices:
-            if vertIndex not in vertDict:
-                vertDict[vertIndex] = []
-            if face not in vertDict[vertIndex]:
-                vertDict[vertIndex].append(face)
-        for edgeKey in face.edge_keys:
-            if edgeKey not in edgeDict:
-                edgeDict[edgeKey] = []
-            if face not in edgeDict[edgeKey]:
-                edgeDict[edgeKey].append(face)
 
-        for loopIndex in face.loops:
-            convertInfo = LoopConvertInfo(uv_data, obj, obj.material_slots[face.material_index].material)
-            f3dVertDict[loopIndex] = getF3DVert(mesh.loops[loopIndex], face, convertInfo, mesh)
-    for face in mesh.loop_triangles:
-        for edgeKey in face.edge_keys:
-            for otherFace in edgeDict[edgeKey]:
-                if otherFace == face:
+    faces = list(mesh.loop_triangles)
+    triCount = len(faces)
+    vertCount = len(mesh.vertices)
+    triVerts = foreachGetArray(mesh.loop_triangles, "vertices", np.int64, triCount * 3).reshape(-1, 3)
+    triLoops = foreachGetArray(mesh.loop_triangles, "loops", np.int64, triCount * 3).reshape(-1, 3)
+    triMaterials = foreachGetArray(mesh.loop_triangles, "material_index", np.int64, triCount)
+
+    infoDict.f3dVertId = getLoopF3DVertIds(obj, mesh, uv_data, triLoops, triMaterials)
+    f3dVertId = infoDict.f3dVertId.tolist()
+
+    # vertex index : [face indices], edge key : [face indices], in face order
+    faceIndices = np.arange(triCount, dtype=np.int64)
+    vertFaceIndices = groupFacesByKey(triVerts.ravel(), np.repeat(faceIndices, 3))
+    edgeStarts, edgeEnds = triVerts, np.roll(triVerts, -1, axis=1)
+    triEdgeKeys = np.minimum(edgeStarts, edgeEnds) * vertCount + np.maximum(edgeStarts, edgeEnds)
+    edgeFaceIndices = groupFacesByKey(triEdgeKeys.ravel(), np.repeat(faceIndices, 3))
+
+    for vertIndex, group in vertFaceIndices.items():
+        vertDict[vertIndex] = [faces[i] for i in group]
+    for edgeKey, group in edgeFaceIndices.items():
+        edgeDict[divmod(edgeKey, vertCount)] = [faces[i] for i in group]
+
+    triVerts = triVerts.tolist()
+    triLoops = triLoops.tolist()
+    triEdgeKeys = triEdgeKeys.tolist()
+
+    def getLoopFromVertIndex(vertIndex, faceIndex):
+        return triLoops[faceIndex][triVerts[faceIndex].index(vertIndex)]
+
+    validNeighborIndices = [[] for _ in range(triCount)]
+    handledPairs = set()
+    for faceIndex in range(triCount):
+        for edgeKey in triEdgeKeys[faceIndex]:
+            for otherIndex in edgeFaceIndices[edgeKey]:
+                if otherIndex == faceIndex:
                     continue
-                if (otherFace, face) not in edgeValidDict and (face, otherFace) not in edgeValidDict:
-                    edgeValid = (
-                        f3dVertDict[getLoopFromVert(edgeKey[0], face)]
-                        == f3dVertDict[getLoopFromVert(edgeKey[0], otherFace)]
-                        and f3dVertDict[getLoopFromVert(edgeKey[1], face)]
-                        == f3dVertDict[getLoopFromVert(edgeKey[1], otherFace)]
+                if (otherIndex, faceIndex) not in handledPairs and (faceIndex, otherIndex) not in handledPairs:
+                    edgeVerts = divmod(edgeKey, vertCount)
+                    edgeValid = all(
+                        f3dVertId[getLoopFromVertIndex(vertIndex, faceIndex)]
+                        == f3dVertId[getLoopFromVertIndex(vertIndex, otherIndex)]
+                        for vertIndex in edgeVerts
                     )
-                    edgeValidDict[(otherFace, face)] = edgeValid
+                    handledPairs.add((otherIndex, faceIndex))
+                    edgeValidDict[(faces[otherIndex], faces[faceIndex])] = edgeValid
                     if edgeValid:
-                        validNeighborDict[face].append(otherFace)
-                        validNeighborDict[otherFace].append(face)
+                        validNeighborIndices[faceIndex].append(otherIndex)
+                        validNeighborIndices[otherIndex].append(faceIndex)
+
+    for face, neighborIndices in zip(faces, validNeighborIndices):
+        validNeighborDict[face] = [faces[i] for i in neighborIndices]
     return infoDict
 
 
+def foreachGetArray(collection, attr: str, dtype, size: int) -> np.ndarray:
+    array = np.empty(size, dtype=dtype)
+    collection.foreach_get(attr, array)
+    return array
+
+
+def groupFacesByKey(keys: np.ndarray, faceIndices: np.ndarray) -> dict[int, list[int]]:
+    """
+    Groups face indices by key, keeping faces in ascending order and dropping repeats of a face within a key.
+    """
+    order = np.lexsort((faceIndices, keys))
+    keys, faceIndices = keys[order], faceIndices[order]
+    keep = np.ones(len(keys), dtype=bool)
+    keep[1:] = (keys[1:] != keys[:-1]) | (faceIndices[1:] != faceIndices[:-1])
+    keys, faceIndices = keys[keep], faceIndices[keep]
+    boundaries = np.flatnonzero(keys[1:] != keys[:-1]) + 1
+    uniqueKeys = keys[np.concatenate(([0], boundaries))] if len(keys) > 0 else keys
+    return {key: group.tolist() for key, group in zip(uniqueKeys.tolist(), np.split(faceIndices, boundaries))}
+
+
+def getLoopColorArray(mesh: bpy.types.Mesh) -> np.ndarray:
+    """
+    Bulk version of getLoopColor, returns a float32 (loop count, 4) array of the same values.
+    Gamma correction goes through mathutils, so it is only done once per unique color.
+    """
+    loopCount = len(mesh.loops)
+    color_layer = getColorLayer(mesh, layer="Col")
+    alpha_layer = getColorLayer(mesh, layer="Alpha")
+    colors = np.ones((loopCount, 4), dtype=np.float64)
+
+    if color_layer is not None:
+        layerColors = foreachGetArray(color_layer, "color", np.float32, len(color_layer) * 4).reshape(-1, 4)
+        layerColors = layerColors[:loopCount]
+        if is3_2_or_above():
+            uniqueColors, inverse = np.unique(layerColors, axis=0, return_inverse=True)
+            corrected = np.array([gammaCorrect(color) for color in uniqueColors.tolist()], dtype=np.float64)
+            colors[:, :3] = corrected.reshape(-1, 3)[inverse.ravel()]
+        else:
+            colors[:, :3] = layerColors[:, :3]
+    if alpha_layer is not None:
+        layerAlphas = foreachGetArray(alpha_layer, "color", np.float32, len(alpha_layer) * 4).reshape(-1, 4)
+        layerAlphas = layerAlphas[:loopCount]
+        uniqueAlphas, inverse = np.unique(layerAlphas, axis=0, return_inverse=True)
+        luminances = []
+        for alphaColor in uniqueAlphas.tolist():
+            if is3_2_or_above():
+                alphaColor = gammaCorrect(alphaColor)
+            luminances.append(colorToLuminance(alphaColor[0:3]))
+        colors[:, 3] = np.array(luminances, dtype=np.float64)[inverse.ravel()]
+
+    # getLoopColor returns a Vector, which stores float32
+    return colors.astype(np.float32)
+
+
+def getLoopNormalArray(mesh: bpy.types.Mesh) -> np.ndarray:
+    """
+    Bulk version of getLoopNormal, returns a float32 (loop count, 3) array of the same values.
+    """
+    normals = foreachGetArray(mesh.loops, "normal", np.float32, len(mesh.loops) * 3).reshape(-1, 3)
+    return (np.round(normals.astype(np.float64) * 2**16) / 2**16).astype(np.float32)
+
+
+def getLoopF3DVertIds(obj, mesh: bpy.types.Mesh, uv_data, triLoops: np.ndarray, triMaterials: np.ndarray):
+    """
+    Returns an id per loop such that two loops share an id exactly when getF3DVert would give equal F3DVerts.
+    """
+    loopCount = len(mesh.loops)
+    positions = foreachGetArray(mesh.vertices, "co", np.float32, len(mesh.vertices) * 3).reshape(-1, 3)
+    loopVerts = foreachGetArray(mesh.loops, "vertex_index", np.int64, loopCount)
+
+    uvs = foreachGetArray(uv_data, "uv", np.float32, len(uv_data) * 2).reshape(-1, 2)
+    uvs = np.nan_to_num(uvs, nan=0.0)
+    uvs[:, 1] = 1 - uvs[:, 1]
+
+    # rgb / normal are None depending on material settings, track that with flags
+    hasRgb = np.zeros(loopCount, dtype=bool)
+    hasNormal = np.zeros(loopCount, dtype=bool)
+    for material_index in np.unique(triMaterials).tolist():
+        has_rgb, has_normal, _ = getRgbNormalSettings(obj.material_slots[material_index].material.f3d_mat)
+        materialLoops = triLoops[triMaterials == material_index].ravel()
+        hasRgb[materialLoops] = has_rgb
+        hasNormal[materialLoops] = has_normal
+
+    colors = getLoopColorArray(mesh)
+    normals = getLoopNormalArray(mesh) if hasNormal.any() else np.zeros((loopCount, 3), dtype=np.float32)
+
+    columns = np.concatenate(
+        (
+            positions[loopVerts],
+            uvs[:loopCount],
+            np.where(hasRgb[:, None], colors[:, :3], 0),
+            np.where(hasNormal[:, None], normals, 0),
+            colors[:, 3:],
+            hasRgb[:, None],
+            hasNormal[:, None],
+        ),
+        axis=1,
+        dtype=np.float64,
+    )
+    # + 0.0 turns -0.0 into 0.0, which compare equal as floats but not as bytes
+    columns = np.ascontiguousarray(columns + 0.0)
+    rows = columns.view(np.dtype((np.void, columns.dtype.itemsize * columns.shape[1]))).ravel()
+    _, ids = np.unique(rows, return_inverse=True)
+    return ids.ravel()
+
+
 def getSTUVRepeats(tex_prop: "TextureProperty") -> tuple[float, float]:
     SShift, TShift = 2**tex_prop.S.shift, 2**tex_prop.T.shift
     sMirrorScale = 2 if tex_prop.S.mirror else 1
@@ -354,6 +474,7 @@ def saveMeshWithLargeTexturesByFaces(
     currentGroupIndex = None
     curImgSet = None
     curTileLines = [0 for _ in range(8)]
+    vertexLoads = [0, 0]
     for tileLoad in tileLoads:
         revertCommands = GfxList("temp", GfxListTag.Draw, fModel.DLFormat)
         # Need load sync because if some tris are not drawn by the RSP due to being
@@ -391,9 +512,10 @@ def saveMeshWithLargeTexturesByFaces(
             material,
             currentGroupIndex,
             triGroup,
-            copy.deepcopy(existingVertData),
-            copy.deepcopy(matRegionDict),
+            existingVertData,
+            matRegionDict,
         )
+        triConverter.vertexLoads = vertexLoads
 
         currentGroupIndex = saveTriangleStrip(triConverter, tileLoad.faces, tileLoad.offsets, obj.data, False)
 
@@ -403,6 +525,8 @@ def saveMeshWithLargeTexturesByFaces(
         firstFace = False
 
     triGroup.triList.commands.append(SPEndDisplayList())
+    if len(tileLoads) > 0:
+        triConverter.reportVertexLoads()
 
     if fMaterial.revert is not None:
         fMesh.draw.commands.append(SPDisplayList(fMaterial.revert))
@@ -619,80 +743,216 @@ def edgeValid(edgeValidDict, face, otherFace):
         return edgeValidDict[(otherFace, face)]
 
 
-def getLowestUnvisitedNeighborCountFace(unvisitedFaces, infoDict):
-    lowestNeighborFace = unvisitedFaces[0]
-    lowestNeighborCount = len(infoDict.validNeighbors[lowestNeighborFace])
-    for face in unvisitedFaces:
-        neighborCount = len(infoDict.validNeighbors[face])
-        if neighborCount < lowestNeighborCount:
-            lowestNeighborFace = face
-            lowestNeighborCount = neighborCount
-    return lowestNeighborFace
-
+class UnvisitedFaceQueue:
+    """
+    Bucket queue of the unvisited faces of a strip, keyed by their number of unvisited valid neighbors.
+    Ties go to the face that comes first in the face list.
+    """
 
-def getNextNeighborFace(faces, face, lastEdgeKey, visitedFaces, possibleFaces, infoDict):
+    def __init__(self, faces, infoDict):
+        self.counts = {}  # face : neighbor count
+        self.positions = {}  # face : index in faces
+        self.buckets = {}  # neighbor count : heap of (index in faces, face), may contain stale entries
+        self.lowestCount = None
+        for i, face in enumerate(faces):
+            self.positions[face] = i
+            self.update(face, len(infoDict.validNeighbors[face]))
+
+    def update(self, face, count):
+        self.counts[face] = count
+        heapq.heappush(self.buckets.setdefault(count, []), (self.positions[face], face))
+        if self.lowestCount is None or count < self.lowestCount:
+            self.lowestCount = count
+
+    def remove(self, face):
+        self.counts.pop(face, None)
+
+    def getLowest(self):
+        if len(self.counts) == 0:
+            return None
+        while True:
+            bucket = self.buckets.get(self.lowestCount)
+            while bucket:
+                face = bucket[0][1]
+                if self.counts.get(face) == self.lowestCount:
+                    return face
+                heapq.heappop(bucket)
+            self.lowestCount += 1
+
+
+def getNextNeighborFace(face, edgeKeys, lastEdgeKey, stripFaces, visitedFaces, possibleFaces, infoDict):
+    """
+    possibleFaces is a dict used as an ordered set, its front is the last inserted key
+    """
     if lastEdgeKey is not None:
         handledEdgeKeys = [lastEdgeKey]
-        nextEdgeKey = face.edge_keys[(face.edge_keys.index(lastEdgeKey) + 1) % 3]
+        nextEdgeKey = edgeKeys[(edgeKeys.index(lastEdgeKey) + 1) % 3]
     else:
         handledEdgeKeys = []
-        nextEdgeKey = face.edge_keys[0]
+        nextEdgeKey = edgeKeys[0]
 
     nextFaceAndEdge = (None, None)
     while nextEdgeKey not in handledEdgeKeys:
         for linkedFace in infoDict.edge[nextEdgeKey]:
-            if linkedFace == face or linkedFace not in faces:
+            if linkedFace == face or linkedFace not in stripFaces:
                 continue
             elif edgeValid(infoDict.edgeValid, linkedFace, face) and linkedFace not in visitedFaces:
                 if nextFaceAndEdge[0] is None:
-                    # print(nextLoop.face)
                     nextFaceAndEdge = (linkedFace, nextEdgeKey)
                 else:
                     # Move face to front of queue
-                    if linkedFace in possibleFaces:
-                        possibleFaces.remove(linkedFace)
-                    possibleFaces.insert(0, linkedFace)
+                    possibleFaces.pop(linkedFace, None)
+                    possibleFaces[linkedFace] = None
         handledEdgeKeys.append(nextEdgeKey)
-        nextEdgeKey = face.edge_keys[(face.edge_keys.index(nextEdgeKey) + 1) % 3]
+        nextEdgeKey = edgeKeys[(edgeKeys.index(nextEdgeKey) + 1) % 3]
     return nextFaceAndEdge
 
 
+def optimizeVertexLoadOrder(order, faceKeys, freeKeys, loadSize, bufferStart, loaded, bufferLen):
+    """
+    Reorders faces to reduce vertex loads for a vertex buffer of loadSize.
+    Keys in freeKeys are already in the untouched buffer region and never loaded.
+    The first load continues from the loaded keys and bufferLen of the current buffer.
+    Each load is filled greedily: the next face is the one adjacent to the loaded verts that needs the fewest new verts,
+    then the one sharing the most already loaded verts, then the earliest in the original (strip) order.
+    When no adjacent face fits, the load continues with the next face in the original order, or a new load starts.
+    """
+    keyFaces = {}  # vertex key : face indices using it
+    for faceIndex in order:
+        for key in faceKeys[faceIndex]:
+            keyFaces.setdefault(key, []).append(faceIndex)
+    position = {faceIndex: i for i, faceIndex in enumerate(order)}
+
+    result = []
+    done = set()
+    nextPosition = 0
+    loaded = set(loaded)
+    while len(result) < len(order):
+        candidates = set(faceIndex for key in loaded for faceIndex in keyFaces.get(key, ()) if faceIndex not in done)
+        while True:
+            bestFace = None
+            bestScore = None
+            for faceIndex in candidates:
+                keys = faceKeys[faceIndex]
+                addedCount = sum(1 for key in keys if key not in loaded and key not in freeKeys)
+                if bufferLen + addedCount > loadSize:
+                    continue
+                score = (addedCount, addedCount - len(keys), position[faceIndex])
+                if bestScore is None or score < bestScore:
+                    bestFace, bestScore = faceIndex, score
+
+            if bestFace is None:
+                while nextPosition < len(order) and order[nextPosition] in done:
+                    nextPosition += 1
+                if nextPosition == len(order):
+                    break
+                faceIndex = order[nextPosition]
+                # Always start a load with at least one face
+                addedCount = sum(1 for key in faceKeys[faceIndex] if key not in loaded and key not in freeKeys)
+                if bufferLen > bufferStart and bufferLen + addedCount > loadSize:
+                    break
+                bestFace = faceIndex
+
+            keys = faceKeys[bestFace]
+            result.append(bestFace)
+            done.add(bestFace)
+            candidates.discard(bestFace)
+            for key in keys:
+                if key not in loaded and key not in freeKeys:
+                    bufferLen += 1
+                    loaded.add(key)
+                    candidates.update(faceIndex for faceIndex in keyFaces[key] if faceIndex not in done)
+
+        loaded = set()
+        bufferLen = bufferStart
+
+    return result
+
+
+def optimizeStripVertexLoads(triConverter, strip):
+    """
+    strip is a list of (face, stOffset) in strip order.
+    Returns the (face, buffer verts) to add, reordered if that needs fewer vertex loads.
+    """
+    faceVerts = [(face, triConverter.getFaceVerts(face, stOffset)) for face, stOffset in strip]
+    faceKeys = [[bufferVert.key() for bufferVert in bufferVerts] for _, bufferVerts in faceVerts]
+    freeKeys = set(
+        bufferVert.key()
+        for _, bufferVerts in faceVerts
+        for bufferVert in bufferVerts
+        if triConverter.isExistingVert(bufferVert.key(), bufferVert.materialIndex)
+    )
+
+    stripOrder = list(range(len(strip)))
+    optimizedOrder = optimizeVertexLoadOrder(
+        stripOrder,
+        faceKeys,
+        freeKeys,
+        triConverter.triConverterInfo.f3d.vert_load_size,
+        triConverter.bufferStart,
+        triConverter.bufferVertIndices.keys(),
+        len(triConverter.vertBuffer),
+    )
+    stripLoads = triConverter.countVertexLoads([faceVerts[i][1] for i in stripOrder])
+    optimizedLoads = triConverter.countVertexLoads([faceVerts[i][1] for i in optimizedOrder])
+
+    triConverter.vertexLoads[0] += stripLoads
+    triConverter.vertexLoads[1] += min(stripLoads, optimizedLoads)
+    if optimizedLoads < stripLoads:
+        return [faceVerts[i] for i in optimizedOrder]
+    return faceVerts
+
+
 def saveTriangleStrip(triConverter, faces, faceSTOffsets, mesh, terminateDL):
-    visitedFaces = []
-    unvisitedFaces = copy.copy(faces)
-    possibleFaces = []
+    strip = []  # (face, stOffset)
+    visitedFaces = set()
+    possibleFaces = {}
     lastEdgeKey = None
     infoDict = triConverter.triConverterInfo.infoDict
-    neighborFace = getLowestUnvisitedNeighborCountFace(unvisitedFaces, infoDict)
+    unvisitedFaces = UnvisitedFaceQueue(faces, infoDict)
+    stripFaces = unvisitedFaces.positions
+    neighborFace = unvisitedFaces.getLowest()
 
     while len(visitedFaces) < len(faces):
-        # print(str(len(visitedFaces)) + " " + str(len(bFaces)))
         if neighborFace is None:
             if len(possibleFaces) > 0:
-                # print("get neighbor from queue")
-                neighborFace = possibleFaces[0]
+                neighborFace = next(reversed(possibleFaces))
                 lastEdgeKey = None
-                possibleFaces = []
+                possibleFaces = {}
             else:
-                # print('get new neighbor')
-                neighborFace = getLowestUnvisitedNeighborCountFace(unvisitedFaces, infoDict)
+                neighborFace = unvisitedFaces.getLowest()
                 lastEdgeKey = None
 
-        stOffset = None if faceSTOffsets is None else faceSTOffsets[faces.index(neighborFace)]
-        triConverter.addFace(neighborFace, stOffset)
+        stOffset = None if faceSTOffsets is None else faceSTOffsets[stripFaces[neighborFace]]
+        strip.append((neighborFace, stOffset))
         if neighborFace in visitedFaces:
             raise PluginError("Repeated face")
-        visitedFaces.append(neighborFace)
+        visitedFaces.add(neighborFace)
         unvisitedFaces.remove(neighborFace)
-        if neighborFace in possibleFaces:
-            possibleFaces.remove(neighborFace)
+        possibleFaces.pop(neighborFace, None)
         for otherFace in infoDict.validNeighbors[neighborFace]:
-            infoDict.validNeighbors[otherFace].remove(neighborFace)
+            otherNeighbors = infoDict.validNeighbors[otherFace]
+            otherNeighbors.remove(neighborFace)
+            if otherFace in unvisitedFaces.counts:
+                unvisitedFaces.update(otherFace, len(otherNeighbors))
 
         neighborFace, lastEdgeKey = getNextNeighborFace(
-            faces, neighborFace, lastEdgeKey, visitedFaces, possibleFaces, infoDict
+            neighborFace,
+            neighborFace.edge_keys,
+            lastEdgeKey,
+            stripFaces,
+            visitedFaces,
+            possibleFaces,
+            infoDict,
         )
 
+    if bpy.context.scene.fast64.settings.optimize_vertex_loads:
+        for face, bufferVerts in optimizeStripVertexLoads(triConverter, strip):
+            triConverter.addFaceVerts(face, bufferVerts)
+    else:
+        for face, stOffset in strip:
+            triConverter.addFace(face, stOffset)
+
     triConverter.finish(terminateDL)
     return triConverter.currentGroupIndex
 
@@ -731,8 +991,8 @@ def saveMeshByFaces(
         material,
         currentGroupIndex,
         triGroup,
-        copy.deepcopy(existingVertData),
-        copy.deepcopy(matRegionDict),
+        existingVertData,
+        matRegionDict,
     )
 
     currentGroupIndex = saveTriangleStrip(triConverter, faces, None, obj.data, True)
@@ -778,19 +1038,30 @@ class F3DVert:
         self.normal: Optional[Vector] = normal
         self.alpha: float = alpha
 
+    def key(self):
+        return (
+            tuple(self.position),
+            tuple(self.uv),
+            self.stOffset,
+            None if self.rgb is None else tuple(self.rgb),
+            None if self.normal is None else tuple(self.normal),
+            self.alpha,
+        )
+
     def __eq__(self, other):
         if not isinstance(other, F3DVert):
             return False
-        return (
-            self.position == other.position
-            and self.uv == other.uv
-            and self.stOffset == other.stOffset
-            and self.rgb == other.rgb
-            and self.normal == other.normal
-            and self.alpha == other.alpha
-        )
+        return self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
 
-    def toVtx(self, mesh, texDimensions, transformMatrix, isPointSampled: bool, tex_scale=(1, 1)) -> Vtx:
+    def toVtx(
+        self, mesh, texDimensions, transformMatrix, isPointSampled: bool, tex_scale=(1, 1), normalMatrix=None
+    ) -> Vtx:
+        """
+        normalMatrix is transformMatrix.inverted().transposed(), pass it in when converting many vertices.
+        """
         # Position (8 bytes)
         position = [int(round(floatValue)) for floatValue in (transformMatrix @ self.position)]
 
@@ -814,7 +1085,9 @@ class F3DVert:
         packedNormal = 0
         if self.normal is not None:
             # normal transformed correctly.
-            normal = (transformMatrix.inverted().transposed() @ self.normal).normalized()
+            if normalMatrix is None:
+                normalMatrix = transformMatrix.inverted().transposed()
+            normal = (normalMatrix @ self.normal).normalized()
             if self.rgb is not None:
                 packedNormal = packNormal(normal)
 
@@ -831,6 +1104,17 @@ class F3DVert:
         return Vtx(position, uv, colorOrNormal, packedNormal)
 
 
+def getNormalMatrix(transformMatrix: mathutils.Matrix) -> Optional[mathutils.Matrix]:
+    """
+    Matrix used by F3DVert.toVtx to transform normals.
+    Returns None if transformMatrix can't be inverted, which is only an error for vertices that have a normal.
+    """
+    try:
+        return transformMatrix.inverted().transposed()
+    except ValueError:
+        return None
+
+
 # groupIndex is either a vertex group (writing), or name of c variable identifying a transform group, like a limb (parsing)
 class BufferVertex:
     def __init__(self, f3dVert: F3DVert, groupIndex: int | str, materialIndex: int):
@@ -838,14 +1122,16 @@ class BufferVertex:
         self.groupIndex: int | str = groupIndex
         self.materialIndex: int = materialIndex
 
+    def key(self):
+        return (self.f3dVert.key(), self.groupIndex, self.materialIndex)
+
     def __eq__(self, other):
         if not isinstance(other, BufferVertex):
             return False
-        return (
-            self.f3dVert == other.f3dVert
-            and self.groupIndex == other.groupIndex
-            and self.materialIndex == other.materialIndex
-        )
+        return self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
 
 
 class TriangleConverterInfo:
@@ -858,8 +1144,10 @@ class TriangleConverterInfo:
         self.f3d = f3d
         self.transformMatrix = transformMatrix
 
-        # Caching names
+        # Caching names and matrices
         self.groupNames = {}
+        self.transformMatrices = {}
+        self.normalMatrices = {}
 
     def getMatrixAddrFromGroup(self, groupIndex):
         raise PluginError(
@@ -867,6 +1155,16 @@ class TriangleConverterInfo:
         )
 
     def getTransformMatrix(self, groupIndex):
+        if groupIndex not in self.transformMatrices:
+            self.transformMatrices[groupIndex] = self.calcTransformMatrix(groupIndex)
+        return self.transformMatrices[groupIndex]
+
+    def getNormalMatrix(self, groupIndex):
+        if groupIndex not in self.normalMatrices:
+            self.normalMatrices[groupIndex] = getNormalMatrix(self.getTransformMatrix(groupIndex))
+        return self.normalMatrices[groupIndex]
+
+    def calcTransformMatrix(self, groupIndex):
         if self.armature is None or groupIndex is None:
             groupMatrix = mathutils.Matrix.Identity(4)
         else:
@@ -899,12 +1197,22 @@ class TriangleConverter:
         self.originalGroupIndex = currentGroupIndex
 
         # Existing data assumed to be already loaded in.
+        # The list is copied since loading appends to the buffer, BufferVertex records are never modified once created.
+        # existingVertexMaterialRegions is only read.
         self.vertBuffer: list[BufferVertex] = []
         if existingVertexData is not None:
-            self.vertBuffer: list[BufferVertex] = existingVertexData
+            self.vertBuffer: list[BufferVertex] = list(existingVertexData)
         self.existingVertexMaterialRegions = existingVertexMaterialRegions
         self.bufferStart = len(self.vertBuffer)
+        # BufferVertex key : first buffer slot, for the untouched region and the loaded region respectively
+        self.existingVertIndices: dict[tuple, int] = {}
+        for i, bufferVert in enumerate(self.vertBuffer):
+            self.existingVertIndices.setdefault(bufferVert.key(), i)
+        self.bufferVertIndices: dict[tuple, int] = {}
         self.vertexBufferTriangles = []  # [(index0, index1, index2)]
+        # Verts loaded in strip order, and after optimizeStripVertexLoads, reported when the DL is finished.
+        # Converters of the same material and object can share it.
+        self.vertexLoads = [0, 0]
 
         self.triGroup = triGroup
         self.triList = triGroup.triList
@@ -917,16 +1225,67 @@ class TriangleConverter:
         self.isPointSampled = isTexturePointSampled(material)
         self.tex_scale = material.f3d_mat.tex_scale
 
-    def vertInBuffer(self, bufferVert, material_index):
+    def isExistingVert(self, key, material_index):
+        """True if the vert is in the untouched buffer region, in the region of its material if there are any"""
+        if key not in self.existingVertIndices:
+            return False
         if self.existingVertexMaterialRegions is None:
-            return bufferVert in self.vertBuffer
-        else:
-            if material_index in self.existingVertexMaterialRegions:
-                matRegion = self.existingVertexMaterialRegions[material_index]
-                if bufferVert in self.vertBuffer[matRegion[0] : matRegion[1]]:
-                    return True
+            return True
+        if material_index in self.existingVertexMaterialRegions:
+            matRegion = self.existingVertexMaterialRegions[material_index]
+            return matRegion[0] <= self.existingVertIndices[key] < matRegion[1]
+        return False
+
+    def vertInBuffer(self, bufferVert, material_index):
+        key = bufferVert.key()
+        return key in self.bufferVertIndices or self.isExistingVert(key, material_index)
+
+    def countVertexLoads(self, faceVerts: list[list[BufferVertex]]):
+        """
+        Number of vertices addFaceVerts would load for faces with these buffer verts, in order,
+        starting from the current buffer. Nothing is added to the buffer.
+        """
+        loadSize = self.triConverterInfo.f3d.vert_load_size
+        loaded = set(self.bufferVertIndices)
+        bufferLen = len(self.vertBuffer)
+        loads = 0
+        for bufferVerts in faceVerts:
+            keys = [bufferVert.key() for bufferVert in bufferVerts]
+            addedKeys = [
+                key
+                for key, bufferVert in zip(keys, bufferVerts)
+                if key not in loaded and not self.isExistingVert(key, bufferVert.materialIndex)
+            ]
+            if bufferLen + len(addedKeys) > loadSize:
+                # Same as resetBuffer(allVerts) in addFaceVerts
+                addedKeys = [key for key in keys if key not in self.existingVertIndices]
+                loaded = set()
+                bufferLen = self.bufferStart
+            loaded.update(addedKeys)
+            bufferLen += len(addedKeys)
+            loads += len(addedKeys)
+        return loads
+
+    def reportVertexLoads(self):
+        if self.vertexLoads[0] > 0:
+            print(
+                f"Vertex loads for {self.triConverterInfo.obj.name} ({self.material.name}): "
+                + f"{self.vertexLoads[0]} -> {self.vertexLoads[1]}"
+            )
+
+    def extendBuffer(self, bufferVerts: list[BufferVertex]):
+        for bufferVert in bufferVerts:
+            self.bufferVertIndices.setdefault(bufferVert.key(), len(self.vertBuffer))
+            self.vertBuffer.append(bufferVert)
+
+    def resetBuffer(self, bufferVerts: list[BufferVertex]):
+        self.vertBuffer = self.vertBuffer[: self.bufferStart]
+        self.bufferVertIndices = {}
+        self.extendBuffer(bufferVerts)
 
-            return bufferVert in self.vertBuffer[self.bufferStart :]
+    def getBufferIndices(self) -> dict[tuple, int]:
+        # Verts in the untouched region take precedence, matching list.index()
+        return {**self.bufferVertIndices, **self.existingVertIndices}
 
     def getSortedBuffer(self) -> dict[int, list[BufferVertex]]:
         limbVerts: dict[int, list[BufferVertex]] = {}
@@ -937,6 +1296,20 @@ class TriangleConverter:
 
         return limbVerts
 
+    def saveVertices(self, bufferVerts: list[BufferVertex]):
+        triConverterInfo = self.triConverterInfo
+        for bufferVert in bufferVerts:
+            self.vtxList.vertices.append(
+                bufferVert.f3dVert.toVtx(
+                    triConverterInfo.mesh,
+                    self.texDimensions,
+                    triConverterInfo.getTransformMatrix(bufferVert.groupIndex),
+                    self.isPointSampled,
+                    tex_scale=self.tex_scale,
+                    normalMatrix=triConverterInfo.getNormalMatrix(bufferVert.groupIndex),
+                )
+            )
+
     def processGeometry(self):
         # Sort verts by limb index, then load current limb verts
         bufferStart = self.bufferStart
@@ -945,7 +1318,7 @@ class TriangleConverter:
 
         if self.currentGroupIndex in limbVerts:
             currentLimbVerts = limbVerts[self.currentGroupIndex]
-            self.vertBuffer = self.vertBuffer[: self.bufferStart] + currentLimbVerts
+            self.resetBuffer(currentLimbVerts)
             self.triList.commands.append(
                 SPVertex(self.vtxList, len(self.vtxList.vertices), len(currentLimbVerts), self.bufferStart)
             )
@@ -953,20 +1326,11 @@ class TriangleConverter:
             del limbVerts[self.currentGroupIndex]
 
             # Save vertices
-            for bufferVert in self.vertBuffer[bufferStart:bufferEnd]:
-                self.vtxList.vertices.append(
-                    bufferVert.f3dVert.toVtx(
-                        self.triConverterInfo.mesh,
-                        self.texDimensions,
-                        self.triConverterInfo.getTransformMatrix(bufferVert.groupIndex),
-                        self.isPointSampled,
-                        tex_scale=self.tex_scale,
-                    )
-                )
+            self.saveVertices(self.vertBuffer[bufferStart:bufferEnd])
 
             bufferStart = bufferEnd
         else:
-            self.vertBuffer = self.vertBuffer[: self.bufferStart]
+            self.resetBuffer([])
 
         # Load other limb verts
         for groupIndex, bufferVerts in limbVerts.items():
@@ -979,26 +1343,17 @@ class TriangleConverter:
                 SPVertex(self.vtxList, len(self.vtxList.vertices), len(bufferVerts), bufferStart)
             )
 
-            self.vertBuffer += bufferVerts
+            self.extendBuffer(bufferVerts)
             bufferEnd += len(bufferVerts)
 
             # Save vertices
-            for bufferVert in self.vertBuffer[bufferStart:bufferEnd]:
-                self.vtxList.vertices.append(
-                    bufferVert.f3dVert.toVtx(
-                        self.triConverterInfo.mesh,
-                        self.texDimensions,
-                        self.triConverterInfo.getTransformMatrix(bufferVert.groupIndex),
-                        self.isPointSampled,
-                        tex_scale=self.tex_scale,
-                    )
-                )
+            self.saveVertices(self.vertBuffer[bufferStart:bufferEnd])
 
             bufferStart = bufferEnd
 
         # Load triangles
         triCmds = createTriangleCommands(
-            self.vertexBufferTriangles, self.vertBuffer, not self.triConverterInfo.f3d.F3D_OLD_GBI
+            self.vertexBufferTriangles, self.getBufferIndices(), not self.triConverterInfo.f3d.F3D_OLD_GBI
         )
         if not self.triConverterInfo.f3d.F3DEX_GBI_3 or not self.material.f3d_mat.use_cel_shading:
             self.triList.commands.extend(triCmds)
@@ -1126,11 +1481,8 @@ class TriangleConverter:
         # Disable alpha compare culling for future DLs
         self.triList.commands.append(SPAlphaCompareCull("G_ALPHA_COMPARE_CULL_DISABLE", 0))
 
-    def addFace(self, face, stOffset):
-        triIndices = []
-        addedVerts = []  # verts added to existing vertexBuffer
-        allVerts = []  # all verts not in 'untouched' buffer region
-
+    def getFaceVerts(self, face, stOffset) -> list[BufferVertex]:
+        bufferVerts = []
         for loopIndex in face.loops:
             loop = self.triConverterInfo.mesh.loops[loopIndex]
             vertexGroup = (
@@ -1138,25 +1490,33 @@ class TriangleConverter:
                 if self.triConverterInfo.vertexGroupInfo is not None
                 else None
             )
-            bufferVert = BufferVertex(
-                getF3DVert(loop, face, self.convertInfo, self.triConverterInfo.mesh), vertexGroup, face.material_index
-            )
-            bufferVert.f3dVert.stOffset = stOffset
-            triIndices.append(bufferVert)
+            f3dVert = getF3DVert(loop, face, self.convertInfo, self.triConverterInfo.mesh)
+            f3dVert.stOffset = stOffset
+            bufferVerts.append(BufferVertex(f3dVert, vertexGroup, face.material_index))
+        return bufferVerts
+
+    def addFace(self, face, stOffset):
+        self.addFaceVerts(face, self.getFaceVerts(face, stOffset))
+
+    def addFaceVerts(self, face, triIndices: list[BufferVertex]):
+        addedVerts = []  # verts added to existing vertexBuffer
+        allVerts = []  # all verts not in 'untouched' buffer region
+
+        for bufferVert in triIndices:
             if not self.vertInBuffer(bufferVert, face.material_index):
                 addedVerts.append(bufferVert)
 
-            if bufferVert not in self.vertBuffer[: self.bufferStart]:
+            if bufferVert.key() not in self.existingVertIndices:
                 allVerts.append(bufferVert)
 
         # We care only about load size, since loading is what takes up time.
         # Even if vert_buffer is larger, its still another load to fill it.
         if len(self.vertBuffer) + len(addedVerts) > self.triConverterInfo.f3d.vert_load_size:
             self.processGeometry()
-            self.vertBuffer = self.vertBuffer[: self.bufferStart] + allVerts
+            self.resetBuffer(allVerts)
             self.vertexBufferTriangles = [triIndices]
         else:
-            self.vertBuffer.extend(addedVerts)
+            self.extendBuffer(addedVerts)
             self.vertexBufferTriangles.append(triIndices)
 
     def finish(self, terminateDL):
@@ -1167,6 +1527,7 @@ class TriangleConverter:
         # 	self.triList.commands.append(SPMatrix(getMatrixAddrFromGroup(self.originalGroupIndex), "G_MTX_LOAD"))
         if terminateDL:
             self.triList.commands.append(SPEndDisplayList())
+            self.reportVertexLoads()
 
 
 def getF3DVert(loop: bpy.types.MeshLoop, face, convertInfo: LoopConvertInfo, mesh: bpy.types.Mesh):
@@ -1228,12 +1589,14 @@ def getLoopColor(loop: bpy.types.MeshLoop, mesh: bpy.types.Mesh) -> Vector:
     return mathutils.Vector((normalizedRGB[0], normalizedRGB[1], normalizedRGB[2], normalizedA))
 
 
-def createTriangleCommands(triangles, vertexBuffer, useSP2Triangle):
-    triangles = copy.deepcopy(triangles)
+def createTriangleCommands(triangles, vertexIndices, useSP2Triangle):
+    """
+    vertexIndices maps BufferVertex keys to their (first) slot in the vertex buffer.
+    """
     commands = []
 
     def getIndices(tri):
-        return [vertexBuffer.index(v) for v in tri]
+        return [vertexIndices[v.key()] for v in tri]
 
     t = 0
     while t < len(triangles):
@@ -1307,6 +1670,18 @@ def saveOrGetF3DMaterial(material, fModel, obj, drawLayer, convertTextureData):
     if materialItem is not None:
         return materialItem
 
+    contentKey = None
+    if fModel.dedup_materials:
+        materialContentKey = fModel.getMaterialContentKey(material)
+        if materialContentKey is not None:
+            contentKey = (materialContentKey,) + materialKey[1:]
+            if contentKey in fModel.materialContentKeys:
+                fModel.materialAliases[materialKey] = fModel.materialContentKeys[contentKey]
+                materialItem = fModel.getMaterialAndHandleShared(materialKey)
+                if materialItem is not None:
+                    return materialItem
+                del fModel.materialAliases[materialKey]
+
     if len(obj.data.materials) == 0:
         raise PluginError("Mesh must have at least one material.")
     materialName = (
@@ -1535,6 +1910,8 @@ def saveOrGetF3DMaterial(material, fModel, obj, drawLayer, convertTextureData):
         fModel.global_data.getCurrentAreaKey(f3dMat),
     )
     fModel.materials[materialKey] = (fMaterial, texDimensions)
+    if contentKey is not None:
+        fModel.materialContentKeys[contentKey] = materialKey
 
     return fMaterial, texDimensions
 
@@ -1841,7 +2218,7 @@ def exportF3DtoC(dirPath, obj, DLFormat, transformMatrix, texDir, savePNG, texSe
 
     if texSeparate:
         texCFile = open(os.path.join(modelDirPath, "texture.inc.c"), "w", newline="\n")
-        texCFile.write(texC.source)
+        texC.writeSource(texCFile)
         texCFile.close()
 
     writeCData(staticData, os.path.join(modelDirPath, "header.h"), os.path.join(modelDirPath, "model.inc.c"))
@@ -119,6 +119,8 @@ def draw_repo_settings(layout: UILayout, context: Context):
     col.prop(fast64_settings, "auto_pick_texture_format")
     if fast64_settings.auto_pick_texture_format:
         col.prop(fast64_settings, "prefer_rgba_over_ci")
+    col.prop(fast64_settings, "dedup_materials")
+    col.prop(fast64_settings, "optimize_vertex_loads")
     col.separator()
 
     draw_rdp_world_defaults(col, scene)
@@ -2,14 +2,16 @@ from re import search
 
 refresh_name = "Refresh 16"
 function_map_path = "./sm64.us.map"
-output_map_path = "./sm64_function_map_output.py"
+output_map_path = "./sm64_function_map_output.txt"
 
 
 def parse_func_map():
     mapfile = open(function_map_path, "r")
     outfile = open(output_map_path, "w")
 
-    outfile.write('\t"' + refresh_name + '" : {\n')
+    # append the output to data/sm64/function_map.txt
+    outfile.write("[" + refresh_name + "]\n")
+    functions = {}
 
     nextLine = mapfile.readline()
     while nextLine != "" and nextLine != "Linker script and memory map\n":
@@ -19,12 +21,12 @@ def parse_func_map():
         " build/us/src/menu/title_screen.o(.text)\n",
     }:
         if nextLine[:17] == " " * 16 + "0":
-            outfile.write('\t\t"' + nextLine[26:34] + '" : ')
             searchName = nextLine[34:]
             searchResult = search(r"\s*(\S*).*", searchName)
-            outfile.write('"' + searchResult.group(1) + '",\n')
+            functions[nextLine[26:34].lower()] = searchResult.group(1)
         nextLine = mapfile.readline()
-    outfile.write("\t}\n")
+    for address in sorted(functions, key=lambda address: int(address, 16)):
+        outfile.write(address + " " + functions[address] + "\n")
 
     mapfile.close()
     outfile.close()
@@ -1,13 +1,15 @@
-import bpy, os, copy, shutil, mathutils, math
+import bpy, os, sys, copy, mathutils, math, struct
+from array import array
 from bpy.utils import register_class, unregister_class
 from ..panels import SM64_Panel
-from .sm64_level_parser import parseLevelAtPointer
+from .sm64_rom_session import SM64_ROMPatchSession, openLevelROM
 from .sm64_rom_tweaks import ExtendBank0x04
 from .sm64_geolayout_bone import animatableBoneTypes
 
 from ..utility import (
     CData,
     PluginError,
+    ROMView,
     ValueFrameData,
     raisePluginError,
     encodeSegmentedAddr,
@@ -25,7 +27,6 @@ from ..utility import (
     applyRotation,
     getPathAndLevel,
     applyBasicTweaks,
-    tempName,
     bytesToHex,
     prop_split,
     customExportWarning,
@@ -33,6 +34,7 @@ from ..utility import (
     makeWriteInfoBox,
     writeBoxExportType,
     stashActionInArmature,
+    ArmaturePoseSampler,
     enumExportHeaderType,
 )
 
@@ -50,6 +52,11 @@ from .sm64_utility import export_rom_checks, import_rom_checks
 
 sm64_anim_types = {"ROTATE", "TRANSLATE"}
 
+# struct Animation: repetitions, mario y offset, unused, start frame, loop end, node count, values, indices, length
+ANIM_HEADER_STRUCT = struct.Struct(">HH2xHHHIII")
+# Per axis index: frame count, offset into the values
+ANIM_INDEX_STRUCT = struct.Struct(">HH")
+
 
 class SM64_Animation:
     def __init__(self, name):
@@ -80,11 +87,11 @@ class SM64_ShortArray:
         self.signed = signed
 
     def to_binary(self):
-        data = bytearray(0)
-        for short in self.shortData:
-            # All euler values have been pre-converted to positive values, so don't care about signed.
-            data += short.to_bytes(2, "big", signed=False)
-        return data
+        # All euler values have been pre-converted to positive values, so don't care about signed.
+        data = array("H", self.shortData)
+        if sys.byteorder != "big":
+            data.byteswap()
+        return bytearray(data.tobytes())
 
     def to_c(self):
         data = "static const " + ("s" if self.signed else "u") + "16 " + self.name + "[] = {\n\t"
@@ -445,34 +452,32 @@ def convertAnimationData(anim, armatureObj, *, frame_start, frame_count):
         [ValueFrameData(i, 0, []), ValueFrameData(i, 1, []), ValueFrameData(i, 2, [])] for i in range(len(animBones))
     ]
 
-    currentFrame = bpy.context.scene.frame_current
-    for frame in range(frame_start, frame_start + frame_count):
-        bpy.context.scene.frame_set(frame)
-        rootPoseBone = armatureObj.pose.bones[animBones[0]]
+    with ArmaturePoseSampler(armatureObj, anim) as sampler:
+        for frame in range(frame_start, frame_start + frame_count):
+            sampler.setFrame(frame)
 
-        translation = (
-            mathutils.Matrix.Scale(bpy.context.scene.fast64.sm64.blender_to_sm64_scale, 4) @ rootPoseBone.matrix_basis
-        ).decompose()[0]
-        saveTranslationFrame(translationData, translation)
+            translation = (
+                mathutils.Matrix.Scale(bpy.context.scene.fast64.sm64.blender_to_sm64_scale, 4)
+                @ sampler.getMatrixBasis(animBones[0])
+            ).decompose()[0]
+            saveTranslationFrame(translationData, translation)
 
-        for boneIndex in range(len(animBones)):
-            boneName = animBones[boneIndex]
-            currentBone = armatureObj.data.bones[boneName]
-            currentPoseBone = armatureObj.pose.bones[boneName]
+            for boneIndex in range(len(animBones)):
+                boneName = animBones[boneIndex]
+                currentBone = armatureObj.data.bones[boneName]
 
-            rotationValue = (currentBone.matrix.to_4x4().inverted() @ currentPoseBone.matrix).to_quaternion()
-            if currentBone.parent is not None:
-                rotationValue = (
-                    currentBone.matrix.to_4x4().inverted()
-                    @ currentPoseBone.parent.matrix.inverted()
-                    @ currentPoseBone.matrix
-                ).to_quaternion()
+                rotationValue = (currentBone.matrix.to_4x4().inverted() @ sampler.getMatrix(boneName)).to_quaternion()
+                if currentBone.parent is not None:
+                    rotationValue = (
+                        currentBone.matrix.to_4x4().inverted()
+                        @ sampler.getMatrix(currentBone.parent.name).inverted()
+                        @ sampler.getMatrix(boneName)
+                    ).to_quaternion()
 
-                # rest pose local, compared to current pose local
+                    # rest pose local, compared to current pose local
 
-            saveQuaternionFrame(armatureFrameData[boneIndex], rotationValue)
+                saveQuaternionFrame(armatureFrameData[boneIndex], rotationValue)
 
-    bpy.context.scene.frame_set(currentFrame)
     removeTrailingFrames(translationData)
     for frameData in armatureFrameData:
         removeTrailingFrames(frameData)
@@ -498,7 +503,7 @@ def getNextBone(boneStack, armatureObj):
     return bone, boneStack
 
 
-def importAnimationToBlender(romfile, startAddress, armatureObj, segmentData, isDMA, animName):
+def importAnimationToBlender(rom, startAddress, armatureObj, segmentData, isDMA, animName):
     boneStack = findStartBones(armatureObj)
     startBoneName = boneStack[0]
     if armatureObj.data.bones[startBoneName].geo_cmd not in animatableBoneTypes:
@@ -506,7 +511,7 @@ def importAnimationToBlender(romfile, startAddress, armatureObj, segmentData, is
         startBoneName = startBone.name
         boneStack = [startBoneName] + boneStack
 
-    animationHeader, armatureFrameData = readAnimation(animName, romfile, startAddress, segmentData, isDMA)
+    animationHeader, armatureFrameData = readAnimation(animName, rom, startAddress, segmentData, isDMA)
 
     if len(armatureFrameData) > len(armatureObj.data.bones) + 1:
         raise PluginError("More bones in animation than on armature.")
@@ -548,13 +553,13 @@ def importAnimationToBlender(romfile, startAddress, armatureObj, segmentData, is
     armatureObj.animation_data.action = anim
 
 
-def readAnimation(name, romfile, startAddress, segmentData, isDMA):
-    animationHeader = readAnimHeader(name, romfile, startAddress, segmentData, isDMA)
+def readAnimation(name, rom, startAddress, segmentData, isDMA):
+    animationHeader = readAnimHeader(name, rom, startAddress, segmentData, isDMA)
 
     print("Frames: " + str(animationHeader.frameInterval[1]) + " / Nodes: " + str(animationHeader.nodeCount))
 
     animationHeader.transformIndices = readAnimIndices(
-        romfile, animationHeader.transformIndicesStart, animationHeader.nodeCount
+        rom, animationHeader.transformIndicesStart, animationHeader.nodeCount
     )
 
     armatureFrameData = []  # list of list of frames
@@ -567,15 +572,9 @@ def readAnimation(name, romfile, startAddress, segmentData, isDMA):
     # handle root translation
     boneFrameData = [[], [], []]
     rootIndexNode = animationHeader.transformIndices[0]
-    boneFrameData[0] = [
-        n for n in getKeyFramesTranslation(romfile, animationHeader.transformValuesStart, rootIndexNode.x)
-    ]
-    boneFrameData[1] = [
-        n for n in getKeyFramesTranslation(romfile, animationHeader.transformValuesStart, rootIndexNode.y)
-    ]
-    boneFrameData[2] = [
-        n for n in getKeyFramesTranslation(romfile, animationHeader.transformValuesStart, rootIndexNode.z)
-    ]
+    boneFrameData[0] = [n for n in getKeyFramesTranslation(rom, animationHeader.transformValuesStart, rootIndexNode.x)]
+    boneFrameData[1] = [n for n in getKeyFramesTranslation(rom, animationHeader.transformValuesStart, rootIndexNode.y)]
+    boneFrameData[2] = [n for n in getKeyFramesTranslation(rom, animationHeader.transformValuesStart, rootIndexNode.z)]
     armatureFrameData.append(boneFrameData)
 
     # handle rotations
@@ -583,118 +582,92 @@ def readAnimation(name, romfile, startAddress, segmentData, isDMA):
         boneFrameData = [[], [], []]
 
         # Transforming SM64 space to Blender space
-        boneFrameData[0] = [
-            n for n in getKeyFramesRotation(romfile, animationHeader.transformValuesStart, boneIndexNode.x)
-        ]
-        boneFrameData[1] = [
-            n for n in getKeyFramesRotation(romfile, animationHeader.transformValuesStart, boneIndexNode.y)
-        ]
-        boneFrameData[2] = [
-            n for n in getKeyFramesRotation(romfile, animationHeader.transformValuesStart, boneIndexNode.z)
-        ]
+        boneFrameData[0] = [n for n in getKeyFramesRotation(rom, animationHeader.transformValuesStart, boneIndexNode.x)]
+        boneFrameData[1] = [n for n in getKeyFramesRotation(rom, animationHeader.transformValuesStart, boneIndexNode.y)]
+        boneFrameData[2] = [n for n in getKeyFramesRotation(rom, animationHeader.transformValuesStart, boneIndexNode.z)]
 
         armatureFrameData.append(boneFrameData)
 
     return (animationHeader, armatureFrameData)
 
 
-def getKeyFramesRotation(romfile, transformValuesStart, boneIndex):
+def getKeyFramesRotation(rom, transformValuesStart, boneIndex):
     ptrToValue = transformValuesStart + boneIndex.startOffset
-    romfile.seek(ptrToValue)
 
     keyframes = []
     for frame in range(boneIndex.numFrames):
-        romfile.seek(ptrToValue + frame * 2)
-        value = int.from_bytes(romfile.read(2), "big") * 360 / (2**16)
+        value = rom.readU16(ptrToValue + frame * 2) * 360 / (2**16)
         keyframes.append(math.radians(value))
 
     return keyframes
 
 
-def getKeyFramesTranslation(romfile, transformValuesStart, boneIndex):
+def getKeyFramesTranslation(rom, transformValuesStart, boneIndex):
     ptrToValue = transformValuesStart + boneIndex.startOffset
-    romfile.seek(ptrToValue)
 
     keyframes = []
     for frame in range(boneIndex.numFrames):
-        romfile.seek(ptrToValue + frame * 2)
-        keyframes.append(
-            int.from_bytes(romfile.read(2), "big", signed=True) / bpy.context.scene.fast64.sm64.blender_to_sm64_scale
-        )
+        keyframes.append(rom.readS16(ptrToValue + frame * 2) / bpy.context.scene.fast64.sm64.blender_to_sm64_scale)
 
     return keyframes
 
 
-def readAnimHeader(name, romfile, startAddress, segmentData, isDMA):
+def readAnimHeader(name, rom, startAddress, segmentData, isDMA):
     frameInterval = [0, 0]
 
-    romfile.seek(startAddress + 0x00)
-    numRepeats = int.from_bytes(romfile.read(2), "big")
-
-    romfile.seek(startAddress + 0x02)
-    marioYOffset = int.from_bytes(romfile.read(2), "big")
-
-    romfile.seek(startAddress + 0x06)
-    frameInterval[0] = int.from_bytes(romfile.read(2), "big")
-
-    romfile.seek(startAddress + 0x08)
-    frameInterval[1] = int.from_bytes(romfile.read(2), "big")
-
-    romfile.seek(startAddress + 0x0A)
-    numNodes = int.from_bytes(romfile.read(2), "big")
-
-    romfile.seek(startAddress + 0x0C)
-    transformValuesOffset = int.from_bytes(romfile.read(4), "big")
+    (
+        numRepeats,
+        marioYOffset,
+        frameInterval[0],
+        frameInterval[1],
+        numNodes,
+        transformValuesOffset,
+        transformIndicesOffset,
+        animSize,
+    ) = rom.unpack(ANIM_HEADER_STRUCT, startAddress)
     if isDMA:
         transformValuesStart = startAddress + transformValuesOffset
     else:
         transformValuesStart = decodeSegmentedAddr(transformValuesOffset.to_bytes(4, byteorder="big"), segmentData)
 
-    romfile.seek(startAddress + 0x10)
-    transformIndicesOffset = int.from_bytes(romfile.read(4), "big")
     if isDMA:
         transformIndicesStart = startAddress + transformIndicesOffset
     else:
         transformIndicesStart = decodeSegmentedAddr(transformIndicesOffset.to_bytes(4, byteorder="big"), segmentData)
 
-    romfile.seek(startAddress + 0x14)
-    animSize = int.from_bytes(romfile.read(4), "big")
-
     return SM64_AnimationHeader(
         name, numRepeats, marioYOffset, frameInterval, numNodes, transformValuesStart, transformIndicesStart, animSize
     )
 
 
-def readAnimIndices(romfile, ptrAddress, nodeCount):
+def readAnimIndices(rom, ptrAddress, nodeCount):
     indices = []
 
     # Handle root transform
-    rootPosIndex = readTransformIndex(romfile, ptrAddress)
+    rootPosIndex = readTransformIndex(rom, ptrAddress)
     indices.append(rootPosIndex)
 
     # Handle rotations
     for i in range(nodeCount):
-        rotationIndex = readTransformIndex(romfile, ptrAddress + (i + 1) * 12)
+        rotationIndex = readTransformIndex(rom, ptrAddress + (i + 1) * 12)
         indices.append(rotationIndex)
 
     return indices
 
 
-def readTransformIndex(romfile, startAddress):
-    x = readValueIndex(romfile, startAddress + 0)
-    y = readValueIndex(romfile, startAddress + 4)
-    z = readValueIndex(romfile, startAddress + 8)
+def readTransformIndex(rom, startAddress):
+    x = readValueIndex(rom, startAddress + 0)
+    y = readValueIndex(rom, startAddress + 4)
+    z = readValueIndex(rom, startAddress + 8)
 
     return SM64_AnimIndexNode(x, y, z)
 
 
-def readValueIndex(romfile, startAddress):
-    romfile.seek(startAddress)
-    numFrames = int.from_bytes(romfile.read(2), "big")
-    romfile.seek(startAddress + 2)
+def readValueIndex(rom, startAddress):
+    numFrames, startOffset = rom.unpack(ANIM_INDEX_STRUCT, startAddress)
 
     # multiply 2 because value is the index in array of shorts (???)
-    startOffset = int.from_bytes(romfile.read(2), "big") * 2
+    startOffset *= 2
     # print(str(hex(startAddress)) + ": " + str(numFrames) + " " + str(startOffset))
     return SM64_AnimIndex(numFrames, startOffset)
 
@@ -716,7 +689,6 @@ class SM64_ExportAnimMario(bpy.types.Operator):
     # Can also be called from operator search menu (Spacebar)
     def execute(self, context):
         romfileOutput = None
-        tempROM = None
         try:
             if len(context.selected_objects) == 0 or not isinstance(
                 context.selected_objects[0].data, bpy.types.Armature
@@ -765,14 +737,14 @@ class SM64_ExportAnimMario(bpy.types.Operator):
                 self.report({"INFO"}, "Success! Animation at " + context.scene.animInsertableBinaryPath)
             else:
                 export_rom_checks(bpy.path.abspath(context.scene.fast64.sm64.export_rom))
-                tempROM = tempName(context.scene.fast64.sm64.output_rom)
-                romfileExport = open(bpy.path.abspath(context.scene.fast64.sm64.export_rom), "rb")
-                shutil.copy(bpy.path.abspath(context.scene.fast64.sm64.export_rom), bpy.path.abspath(tempROM))
-                romfileExport.close()
-                romfileOutput = open(bpy.path.abspath(tempROM), "rb+")
+                romSession = SM64_ROMPatchSession(
+                    bpy.path.abspath(context.scene.fast64.sm64.export_rom),
+                    bpy.path.abspath(context.scene.fast64.sm64.output_rom),
+                )
+                romfileOutput = romSession.romfile
 
                 # Note actual level doesn't matter for Mario, since he is in all of 	them
-                levelParsed = parseLevelAtPointer(romfileOutput, level_pointers[context.scene.levelAnimExport])
+                levelParsed = romSession.parseLevelAtPointer(level_pointers[context.scene.levelAnimExport])
                 segmentData = levelParsed.segmentData
                 if context.scene.fast64.sm64.extend_bank_4:
                     ExtendBank0x04(romfileOutput, segmentData, defaultExtendSegment4)
@@ -807,10 +779,7 @@ class SM64_ExportAnimMario(bpy.types.Operator):
                 else:
                     segmentedPtr = None
 
-                romfileOutput.close()
-                if os.path.exists(bpy.path.abspath(context.scene.fast64.sm64.output_rom)):
-                    os.remove(bpy.path.abspath(context.scene.fast64.sm64.output_rom))
-                os.rename(bpy.path.abspath(tempROM), bpy.path.abspath(context.scene.fast64.sm64.output_rom))
+                romSession.save()
 
                 if not context.scene.isDMAExport:
                     if context.scene.setAnimListIndex:
@@ -850,8 +819,6 @@ class SM64_ExportAnimMario(bpy.types.Operator):
 
             if romfileOutput is not None:
                 romfileOutput.close()
-            if tempROM is not None and os.path.exists(bpy.path.abspath(tempROM)):
-                os.remove(bpy.path.abspath(tempROM))
             raisePluginError(self, e)
             return {"CANCELLED"}  # must return a set
 
@@ -931,12 +898,13 @@ class SM64_ImportAnimMario(bpy.types.Operator):
         romfileSrc = None
         try:
             import_rom_checks(bpy.path.abspath(context.scene.fast64.sm64.import_rom))
-            romfileSrc = open(bpy.path.abspath(context.scene.fast64.sm64.import_rom), "rb")
+            romfileSrc, levelParsed = openLevelROM(
+                bpy.path.abspath(context.scene.fast64.sm64.import_rom), level_pointers[context.scene.levelAnimImport]
+            )
         except Exception as e:
             raisePluginError(self, e)
             return {"CANCELLED"}
         try:
-            levelParsed = parseLevelAtPointer(romfileSrc, level_pointers[context.scene.levelAnimImport])
             segmentData = levelParsed.segmentData
 
             animStart = int(context.scene.animStartImport, 16)
@@ -944,9 +912,7 @@ class SM64_ImportAnimMario(bpy.types.Operator):
                 animStart = decodeSegmentedAddr(animStart.to_bytes(4, "big"), segmentData)
 
             if not context.scene.isDMAImport and context.scene.animIsAnimList:
-                romfileSrc.seek(animStart + 4 * context.scene.animListIndexImport)
-                actualPtr = romfileSrc.read(4)
-                animStart = decodeSegmentedAddr(actualPtr, segmentData)
+                animStart = romfileSrc.readSegmentedAddr(animStart + 4 * context.scene.animListIndexImport, segmentData)
 
             if len(context.selected_objects) == 0:
                 raise PluginError("Armature not selected.")
@@ -979,7 +945,7 @@ class SM64_ImportAllMarioAnims(bpy.types.Operator):
         romfileSrc = None
         try:
             import_rom_checks(bpy.path.abspath(context.scene.fast64.sm64.import_rom))
-            romfileSrc = open(bpy.path.abspath(context.scene.fast64.sm64.import_rom), "rb")
+            romfileSrc = ROMView.openFile(bpy.path.abspath(context.scene.fast64.sm64.import_rom))
         except Exception as e:
             raisePluginError(self, e)
             return {"CANCELLED"}
@@ -1,4 +1,4 @@
-import bpy, shutil, os, math, mathutils
+import bpy, os, math, mathutils
 from bpy.utils import register_class, unregister_class
 from io import BytesIO
 from .sm64_constants import (
@@ -10,7 +10,7 @@ from .sm64_constants import (
 )
 from .sm64_utility import export_rom_checks
 from .sm64_objects import SM64_Area, start_process_sm64_objects
-from .sm64_level_parser import parseLevelAtPointer
+from .sm64_rom_session import SM64_ROMPatchSession
 from .sm64_rom_tweaks import ExtendBank0x04
 from ..panels import SM64_Panel
 
@@ -31,7 +31,6 @@ from ..utility import (
     applyRotation,
     getPathAndLevel,
     applyBasicTweaks,
-    tempName,
     bytesToHex,
     applyRotation,
     customExportWarning,
@@ -398,17 +397,19 @@ def exportCollisionCommon(obj, transformMatrix, includeSpecials, includeChildren
         raise Exception(str(e))
 
     collision = Collision(toAlnum(name) + "_collision")
+    # dict of rounded position : index in collision.vertices
+    vertIndices = {}
     for collisionType, faces in collisionDict.items():
         collision.triangles[collisionType] = []
         for faceVerts, specialParam, room in faces:
             indices = []
             for roundedPosition in faceVerts:
-                index = collisionVertIndex(roundedPosition, collision.vertices)
+                index = vertIndices.get(roundedPosition)
                 if index is None:
+                    index = len(collision.vertices)
+                    vertIndices[roundedPosition] = index
                     collision.vertices.append(CollisionVertex(roundedPosition))
-                    indices.append(len(collision.vertices) - 1)
-                else:
-                    indices.append(index)
+                indices.append(index)
             collision.triangles[collisionType].append(CollisionTriangle(indices, specialParam, room))
     if includeSpecials:
         area = SM64_Area(areaIndex, "", "", "", None, None, [], name, None)
@@ -461,14 +462,6 @@ def roundPosition(position):
     return (int(round(position[0])), int(round(position[1])), int(round(position[2])))
 
 
-def collisionVertIndex(vert, vertArray):
-    for i in range(len(vertArray)):
-        colVert = vertArray[i]
-        if colVert.position == vert:
-            return i
-    return None
-
-
 class SM64_ExportCollision(bpy.types.Operator):
     # set bl_ properties
     bl_idname = "object.sm64_export_collision"
@@ -479,7 +472,6 @@ class SM64_ExportCollision(bpy.types.Operator):
 
     def execute(self, context):
         romfileOutput = None
-        tempROM = None
         props = context.scene.fast64.sm64.combined_export
         try:
             obj = None
@@ -530,14 +522,14 @@ class SM64_ExportCollision(bpy.types.Operator):
                 )
                 self.report({"INFO"}, "Success! Collision at " + context.scene.colInsertableBinaryPath)
             else:
-                tempROM = tempName(context.scene.fast64.sm64.output_rom)
                 export_rom_checks(bpy.path.abspath(context.scene.fast64.sm64.export_rom))
-                romfileExport = open(bpy.path.abspath(context.scene.fast64.sm64.export_rom), "rb")
-                shutil.copy(bpy.path.abspath(context.scene.fast64.sm64.export_rom), bpy.path.abspath(tempROM))
-                romfileExport.close()
-                romfileOutput = open(bpy.path.abspath(tempROM), "rb+")
+                romSession = SM64_ROMPatchSession(
+                    bpy.path.abspath(context.scene.fast64.sm64.export_rom),
+                    bpy.path.abspath(context.scene.fast64.sm64.output_rom),
+                )
+                romfileOutput = romSession.romfile
 
-                levelParsed = parseLevelAtPointer(romfileOutput, level_pointers[context.scene.colExportLevel])
+                levelParsed = romSession.parseLevelAtPointer(level_pointers[context.scene.colExportLevel])
                 segmentData = levelParsed.segmentData
 
                 if context.scene.fast64.sm64.extend_bank_4:
@@ -559,11 +551,7 @@ class SM64_ExportCollision(bpy.types.Operator):
                     romfileOutput.write(segAddress)
                 segPointer = bytesToHex(segAddress)
 
-                romfileOutput.close()
-
-                if os.path.exists(bpy.path.abspath(context.scene.fast64.sm64.output_rom)):
-                    os.remove(bpy.path.abspath(context.scene.fast64.sm64.output_rom))
-                os.rename(bpy.path.abspath(tempROM), bpy.path.abspath(context.scene.fast64.sm64.output_rom))
+                romSession.save()
 
                 self.report(
                     {"INFO"},
@@ -588,8 +576,6 @@ class SM64_ExportCollision(bpy.types.Operator):
             if context.scene.fast64.sm64.export_type == "Binary":
                 if romfileOutput is not None:
                     romfileOutput.close()
-                if tempROM is not None and os.path.exists(bpy.path.abspath(tempROM)):
-                    os.remove(bpy.path.abspath(tempROM))
             obj.select_set(True)
             context.view_layer.objects.active = obj
             raisePluginError(self, e)
@@ -0,0 +1,88 @@
+import struct
+
+from ..utility import PluginError, ROMView
+
+# MIO0 and Yay0 share the same layout:
+#   0x0: magic, 0x4: decompressed size, 0x8: back reference stream offset, 0xC: literal stream offset,
+#   0x10: layout bits, read as 32 bit words, most significant bit first.
+# A set bit copies a single byte from the literal stream, a cleared bit reads a 16 bit back reference.
+# MIO0 back references are (length - 3) << 12 | (distance - 1).
+# Yay0 back references are (length - 2) << 12 | (distance - 1), and a length field of 0 means the length is
+# the next byte of the literal stream + 0x12.
+MIO0_MAGIC = b"MIO0"
+YAY0_MAGIC = b"Yay0"
+COMPRESSION_HEADER = struct.Struct(">4sIII")
+
+
+def isCompressed(data: bytes, offset: int = 0):
+    return data[offset : offset + 4] in (MIO0_MAGIC, YAY0_MAGIC)
+
+
+def decompress(data: bytes, offset: int = 0) -> bytearray:
+    """Decompresses the MIO0 or Yay0 block at offset"""
+    magic, size, refOffset, literalOffset = COMPRESSION_HEADER.unpack_from(data, offset)
+    if magic not in (MIO0_MAGIC, YAY0_MAGIC):
+        raise PluginError(f"No MIO0 or Yay0 data at {hex(offset)}.")
+    isYay0 = magic == YAY0_MAGIC
+
+    out = bytearray()
+    bitsPos = offset + 0x10
+    refPos = offset + refOffset
+    literalPos = offset + literalOffset
+    bits = 0
+    bitCount = 0
+
+    while len(out) < size:
+        if bitCount == 0:
+            bits = int.from_bytes(data[bitsPos : bitsPos + 4], "big")
+            bitsPos += 4
+            bitCount = 32
+
+        # Copy a whole run of literals at once
+        if bits & 0x80000000:
+            run = min(32 - (~bits & 0xFFFFFFFF).bit_length(), bitCount, size - len(out))
+            out += data[literalPos : literalPos + run]
+            literalPos += run
+            bits = (bits << run) & 0xFFFFFFFF
+            bitCount -= run
+            continue
+
+        bits = (bits << 1) & 0xFFFFFFFF
+        bitCount -= 1
+
+        ref = (data[refPos] << 8) | data[refPos + 1]
+        refPos += 2
+        distance = (ref & 0xFFF) + 1
+        if isYay0:
+            length = ref >> 12
+            if length == 0:
+                length = data[literalPos] + 0x12
+                literalPos += 1
+            else:
+                length += 2
+        else:
+            length = (ref >> 12) + 3
+
+        start = len(out) - distance
+        if start < 0:
+            raise PluginError(f"Invalid back reference in compressed data at {hex(offset)}.")
+        if distance >= length:
+            out += out[start : start + length]
+        else:
+            # Overlapping copy, the last distance bytes repeat
+            pattern = out[start:]
+            out += (pattern * (length // distance + 1))[:length]
+
+    del out[size:]
+    return out
+
+
+def loadCompressedSegment(rom: ROMView, start: int, end: int):
+    """
+    Decompresses the MIO0/Yay0 segment between start and end, and appends the data past the end of rom,
+    which must be backed by an in memory copy of the ROM (a bytearray).
+    Returns the range of the decompressed data to use as the segment range, or None if the data isn't compressed.
+    """
+    if not isCompressed(rom.data, start):
+        return None
+    return rom.appendSegment(decompress(rom.data, start))
@@ -9,7 +9,7 @@ from ..panels import SM64_Panel
 from ..f3d.f3d_parser import F3DtoBlenderObject
 from .sm64_constants import level_enums, level_pointers
 from .sm64_utility import import_rom_checks
-from .sm64_level_parser import parseLevelAtPointer
+from .sm64_rom_session import openLevelROM
 
 from ..utility import (
     PluginError,
@@ -39,8 +39,9 @@ class SM64_ImportDL(Operator):
             return {"CANCELLED"}
         try:
             import_rom_checks(abspath(context.scene.fast64.sm64.import_rom))
-            romfileSrc = open(abspath(context.scene.fast64.sm64.import_rom), "rb")
-            levelParsed = parseLevelAtPointer(romfileSrc, level_pointers[context.scene.levelDLImport])
+            romfileSrc, levelParsed = openLevelROM(
+                abspath(context.scene.fast64.sm64.import_rom), level_pointers[context.scene.levelDLImport]
+            )
             segmentData = levelParsed.segmentData
             start = (
                 decodeSegmentedAddr(int(context.scene.DLImportStart, 16).to_bytes(4, "big"), segmentData)
@@ -1,5 +1,5 @@
 from pathlib import Path
-import shutil, copy, bpy, re, os
+import copy, bpy, re, os
 from io import BytesIO
 from math import ceil, log, radians
 from mathutils import Matrix, Vector
@@ -16,7 +16,7 @@ from ..f3d.f3d_material import (
 )
 from .sm64_texscroll import modifyTexScrollFiles, modifyTexScrollHeadersGroup
 from .sm64_utility import export_rom_checks, starSelectWarning
-from .sm64_level_parser import parseLevelAtPointer
+from .sm64_rom_session import SM64_ROMPatchSession
 from .sm64_rom_tweaks import ExtendBank0x04
 from typing import Tuple, Union, Iterable
 
@@ -74,7 +74,6 @@ from ..utility import (
     writeInsertableFile,
     getPathAndLevel,
     applyBasicTweaks,
-    tempName,
     getAddressFromRAMAddress,
     bytesToHex,
     customExportWarning,
@@ -415,17 +414,17 @@ def sm64ExportF3DtoC(
 
     if texSeparate:
         texCFile = open(os.path.join(modelDirPath, "texture.inc.c"), "w", newline="\n")
-        texCFile.write(texC.source)
+        texC.writeSource(texCFile)
         texCFile.close()
 
     modelPath = os.path.join(modelDirPath, "model.inc.c")
     outFile = open(modelPath, "w", newline="\n")
-    outFile.write(staticData.source)
+    staticData.writeSource(outFile)
     outFile.close()
 
     headerPath = os.path.join(modelDirPath, "header.h")
     cDefFile = open(headerPath, "w", newline="\n")
-    cDefFile.write(staticData.header)
+    staticData.writeHeader(cDefFile)
     cDefFile.close()
 
     fileStatus = None
@@ -592,7 +591,6 @@ class SM64_ExportDL(bpy.types.Operator):
     # Can also be called from operator search menu (Spacebar)
     def execute(self, context):
         romfileOutput = None
-        tempROM = None
         try:
             if context.mode != "OBJECT":
                 raise PluginError("Operator can only be used in object mode.")
@@ -650,13 +648,13 @@ class SM64_ExportDL(bpy.types.Operator):
                 self.report({"INFO"}, "Success! DL at " + context.scene.DLInsertableBinaryPath + ".")
             else:
                 export_rom_checks(bpy.path.abspath(context.scene.fast64.sm64.export_rom))
-                tempROM = tempName(context.scene.fast64.sm64.output_rom)
-                romfileExport = open(bpy.path.abspath(context.scene.fast64.sm64.export_rom), "rb")
-                shutil.copy(bpy.path.abspath(context.scene.fast64.sm64.export_rom), bpy.path.abspath(tempROM))
-                romfileExport.close()
-                romfileOutput = open(bpy.path.abspath(tempROM), "rb+")
+                romSession = SM64_ROMPatchSession(
+                    bpy.path.abspath(context.scene.fast64.sm64.export_rom),
+                    bpy.path.abspath(context.scene.fast64.sm64.output_rom),
+                )
+                romfileOutput = romSession.romfile
 
-                levelParsed = parseLevelAtPointer(romfileOutput, level_pointers[context.scene.levelDLExport])
+                levelParsed = romSession.parseLevelAtPointer(level_pointers[context.scene.levelDLExport])
                 segmentData = levelParsed.segmentData
                 if context.scene.fast64.sm64.extend_bank_4:
                     ExtendBank0x04(romfileOutput, segmentData, defaultExtendSegment4)
@@ -684,10 +682,7 @@ class SM64_ExportDL(bpy.types.Operator):
                     romfileOutput.seek(int(context.scene.DLExportGeoPtr, 16))
                     romfileOutput.write(segPointerData)
 
-                romfileOutput.close()
-                if os.path.exists(bpy.path.abspath(context.scene.fast64.sm64.output_rom)):
-                    os.remove(bpy.path.abspath(context.scene.fast64.sm64.output_rom))
-                os.rename(bpy.path.abspath(tempROM), bpy.path.abspath(context.scene.fast64.sm64.output_rom))
+                romSession.save()
 
                 if context.scene.DLUseBank0:
                     self.report(
@@ -722,8 +717,6 @@ class SM64_ExportDL(bpy.types.Operator):
             if context.scene.fast64.sm64.export_type == "Binary":
                 if romfileOutput is not None:
                     romfileOutput.close()
-                if tempROM is not None and os.path.exists(bpy.path.abspath(tempROM)):
-                    os.remove(bpy.path.abspath(tempROM))
             raisePluginError(self, e)
             return {"CANCELLED"}  # must return a set
 
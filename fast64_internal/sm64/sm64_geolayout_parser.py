@@ -2,7 +2,7 @@ import bpy, mathutils, math, bmesh, copy
 from bpy.utils import register_class, unregister_class
 from ..f3d.f3d_parser import createBlankMaterial, parseF3DBinary
 from ..panels import SM64_Panel
-from .sm64_level_parser import parseLevelAtPointer
+from .sm64_rom_session import openLevelROM
 from .sm64_constants import level_pointers, level_enums
 from .sm64_geolayout_bone import enumShadowType, animatableBoneTypes, enumBoneType
 from .sm64_geolayout_constants import getGeoLayoutCmdLength, nodeGroupCmds, GEO_BRANCH_STORE
@@ -62,7 +62,7 @@ blender_modes = {"OBJECT", "BONE"}
 
 
 def parseGeoLayout(
-    romfile,
+    rom,
     startAddress,
     scene,
     segmentData,
@@ -72,7 +72,6 @@ def parseGeoLayout(
     shadeSmooth,
 ):
     currentAddress = startAddress
-    romfile.seek(currentAddress)
 
     # Create new skinned mesh
     # bpy.ops.object.mode_set(mode = 'OBJECT')
@@ -101,7 +100,7 @@ def parseGeoLayout(
     # Parse geolayout
     # Pretend that command starts with an 0x04
     currentAddress, armatureMeshGroups = parseNode(
-        romfile,
+        rom,
         startAddress,
         currentAddress - 4,
         [0x04, 0x00],
@@ -182,7 +181,7 @@ def parseGeoLayout(
 # Every node returns the address AFTER the end of its processing extent.
 # Make sure to NOT create blender objects if the node is being ignored.
 def parseNode(
-    romfile,
+    rom,
     geoStartAddress,
     currentAddress,
     currentCmd,
@@ -205,8 +204,7 @@ def parseNode(
     currentTransform = copy.deepcopy(currentTransform)
     originalTransform = copy.deepcopy(currentTransform)
     currentAddress += getGeoLayoutCmdLength(*currentCmd)
-    romfile.seek(currentAddress)
-    currentCmd = romfile.read(2)
+    currentCmd = rom.read(currentAddress, 2)
     armatureMeshGroups = []
 
     # True if at least one complete node processed.
@@ -258,11 +256,11 @@ def parseNode(
             switchLevel = switchCount
 
         if currentCmd[0] == GEO_BRANCH_STORE and not ignoreNode:  # 0x00
-            currentAddress = parseBranchStore(romfile, currentCmd, currentAddress, jumps, segmentData=segmentData)
+            currentAddress = parseBranchStore(rom, currentCmd, currentAddress, jumps, segmentData=segmentData)
             singleChildStack.append(False)
             nodeIndex.append(0)
         elif currentCmd[0] == GEO_BRANCH and not ignoreNode:  # 0x02
-            currentAddress = parseBranch(romfile, currentCmd, currentAddress, jumps, segmentData=segmentData)
+            currentAddress = parseBranch(rom, currentCmd, currentAddress, jumps, segmentData=segmentData)
             singleChildStack.append(False)
             nodeIndex.append(0)
 
@@ -275,7 +273,7 @@ def parseNode(
             # print(str(switchCount) + " - " + str(localSwitchCount) + " - " + \
             # 	str(switchLevel))
             currentAddress, newArmatureMeshGroups = parseNode(
-                romfile,
+                rom,
                 geoStartAddress,
                 currentAddress,
                 currentCmd,
@@ -299,7 +297,7 @@ def parseNode(
 
         elif currentCmd[0] == GEO_START:  # 0x0B
             currentAddress, nextParentBoneName, nextParentTransform = parseStart(
-                romfile,
+                rom,
                 currentAddress,
                 currentTransform,
                 armatureObj,
@@ -311,7 +309,7 @@ def parseNode(
 
         elif currentCmd[0] == GEO_SWITCH:  # 0x0E
             currentAddress, nextParentBoneName = parseSwitch(
-                romfile,
+                rom,
                 currentAddress,
                 currentTransform,
                 armatureObj,
@@ -326,7 +324,7 @@ def parseNode(
         # This allows us to import model animations without having to transform keyframes.
         elif currentCmd[0] == GEO_TRANSLATE_ROTATE:  # 0x10
             currentAddress, nextParentBoneName, nextParentTransform = parseTranslateRotate(
-                romfile,
+                rom,
                 currentAddress,
                 currentCmd,
                 currentTransform,
@@ -342,7 +340,7 @@ def parseNode(
 
         elif currentCmd[0] == GEO_TRANSLATE:  # 0x11
             currentAddress, nextParentBoneName, nextParentTransform = parseTranslate(
-                romfile,
+                rom,
                 currentAddress,
                 currentCmd,
                 currentTransform,
@@ -358,7 +356,7 @@ def parseNode(
 
         elif currentCmd[0] == GEO_ROTATE:  # 0x12
             currentAddress, nextParentBoneName, nextParentTransform = parseRotate(
-                romfile,
+                rom,
                 currentAddress,
                 currentCmd,
                 currentTransform,
@@ -374,7 +372,7 @@ def parseNode(
 
         elif currentCmd[0] == GEO_LOAD_DL_W_OFFSET:  # 0x13
             currentAddress, nextParentBoneName, nextParentTransform = parseDLWithOffset(
-                romfile,
+                rom,
                 currentAddress,
                 currentTransform,
                 bMesh,
@@ -390,7 +388,7 @@ def parseNode(
 
         elif currentCmd[0] == GEO_BILLBOARD:  # 0x14
             currentAddress, nextParentBoneName, nextParentTransform = parseBillboard(
-                romfile,
+                rom,
                 currentAddress,
                 currentCmd,
                 currentTransform,
@@ -406,7 +404,7 @@ def parseNode(
 
         elif currentCmd[0] == GEO_LOAD_DL:  # 0x15
             currentAddress = parseDL(
-                romfile,
+                rom,
                 currentAddress,
                 currentTransform,
                 bMesh,
@@ -422,7 +420,7 @@ def parseNode(
 
         elif currentCmd[0] == GEO_START_W_SHADOW:  # 0x16
             currentAddress, nextParentBoneName, nextParentTransform = parseShadow(
-                romfile,
+                rom,
                 currentAddress,
                 currentTransform,
                 armatureObj,
@@ -434,7 +432,7 @@ def parseNode(
 
         elif currentCmd[0] == GEO_CALL_ASM:  # 0x18
             currentAddress = parseFunction(
-                romfile,
+                rom,
                 currentAddress,
                 currentTransform,
                 armatureObj,
@@ -446,7 +444,7 @@ def parseNode(
 
         elif currentCmd[0] == GEO_HELD_OBJECT:  # 0x1C
             currentAddress, nextParentTransform = parseHeldObject(
-                romfile,
+                rom,
                 currentAddress,
                 currentTransform,
                 armatureObj,
@@ -458,7 +456,7 @@ def parseNode(
 
         elif currentCmd[0] == GEO_SCALE:  # 0x1D
             currentAddress, nextParentBoneName, nextParentTransform = parseScale(
-                romfile,
+                rom,
                 currentAddress,
                 currentCmd,
                 currentTransform,
@@ -474,7 +472,7 @@ def parseNode(
 
         elif currentCmd[0] == GEO_START_W_RENDERAREA:  # 0x20
             currentAddress, nextParentBoneName, nextParentTransform = parseStartWithRenderArea(
-                romfile,
+                rom,
                 currentAddress,
                 currentTransform,
                 armatureObj,
@@ -490,9 +488,8 @@ def parseNode(
 
         nodeIndex[-1] += 1
 
-        romfile.seek(currentAddress)
         previousCmdType = currentCmd[0]
-        currentCmd = romfile.read(2)
+        currentCmd = rom.read(currentAddress, 2)
 
         if previousCmdType not in nodeGroupCmds or currentCmd[0] != GEO_NODE_OPEN:
             completeNodeProcessed = True
@@ -807,16 +804,13 @@ def createSwitchOption(
     return boneName, (switchArmature, bMesh, obj), finalTransform, finalNextParentTransform
 
 
-def parseSwitch(
-    romfile, currentAddress, currentTransform, armatureObj, parentBoneName, ignoreNode, nodeIndex, segmentData
-):
+def parseSwitch(rom, currentAddress, currentTransform, armatureObj, parentBoneName, ignoreNode, nodeIndex, segmentData):
     print("SWITCH " + hex(currentAddress))
 
     commandSize = 8
 
     if not ignoreNode:
-        romfile.seek(currentAddress)
-        command = romfile.read(commandSize)
+        command = rom.read(currentAddress, commandSize)
         funcParam = int.from_bytes(command[2:4], "big", signed=True)
         switchFunc = bytesToHexClean(command[4:8])
 
@@ -834,7 +828,7 @@ def parseSwitch(
 
 
 def parseDL(
-    romfile,
+    rom,
     currentAddress,
     currentTransform,
     bMesh,
@@ -849,13 +843,12 @@ def parseDL(
 ):
     drawLayer = bitMask(currentCmd[1], 0, 4)
 
-    romfile.seek(currentAddress)
     commandSize = 8
-    command = romfile.read(commandSize)
+    command = rom.read(currentAddress, commandSize)
 
     if not ignoreNode:
         boneName = handleNodeCommon(
-            romfile,
+            rom,
             armatureObj,
             parentBoneName,
             currentTransform,
@@ -877,7 +870,7 @@ def parseDL(
 
 
 def parseDLWithOffset(
-    romfile,
+    rom,
     currentAddress,
     currentTransform,
     bMesh,
@@ -891,9 +884,8 @@ def parseDLWithOffset(
     vertexBuffer,
 ):
     print("DL_OFFSET " + hex(currentAddress))
-    romfile.seek(currentAddress)
 
-    command = romfile.read(getGeoLayoutCmdLength(*currentCmd))
+    command = rom.read(currentAddress, getGeoLayoutCmdLength(*currentCmd))
 
     drawLayer = command[1]
 
@@ -925,7 +917,7 @@ def parseDLWithOffset(
             displayListStartAddress = decodeSegmentedAddr(segmentedAddr, segmentData=segmentData)
             # print(displayListStartAddress)
             parseF3DBinary(
-                romfile,
+                rom,
                 displayListStartAddress,
                 bpy.context.scene,
                 bMesh,
@@ -939,17 +931,14 @@ def parseDLWithOffset(
     # Handle child objects
     # Validate that next command is 04 (open node)
     currentAddress += getGeoLayoutCmdLength(*currentCmd)
-    romfile.seek(currentAddress)  # DONT FORGET THIS, FIXES PARENTING BUG
-    currentCmd = romfile.read(2)
 
     return currentAddress, boneName, finalTransform
 
 
-def parseBranch(romfile, currentCmd, currentAddress, jumps, segmentData=None):
+def parseBranch(rom, currentCmd, currentAddress, jumps, segmentData=None):
     print("BRANCH " + hex(currentAddress))
-    romfile.seek(currentAddress)
     postJumpAddr = currentAddress + getGeoLayoutCmdLength(*currentCmd)
-    currentCmd = romfile.read(getGeoLayoutCmdLength(*currentCmd))
+    currentCmd = rom.read(currentAddress, getGeoLayoutCmdLength(*currentCmd))
 
     if currentCmd[1] == 1:
         jumps.append(postJumpAddr)
@@ -958,11 +947,10 @@ def parseBranch(romfile, currentCmd, currentAddress, jumps, segmentData=None):
     return currentAddress
 
 
-def parseBranchStore(romfile, currentCmd, currentAddress, jumps, segmentData=None):
+def parseBranchStore(rom, currentCmd, currentAddress, jumps, segmentData=None):
     print("BRANCH AND STORE " + hex(currentAddress))
-    romfile.seek(currentAddress)
     postJumpAddr = currentAddress + getGeoLayoutCmdLength(*currentCmd)
-    currentCmd = romfile.read(getGeoLayoutCmdLength(*currentCmd))
+    currentCmd = rom.read(currentAddress, getGeoLayoutCmdLength(*currentCmd))
 
     jumps.append(postJumpAddr)
     currentAddress = decodeSegmentedAddr(currentCmd[4:8], segmentData=segmentData)
@@ -978,7 +966,7 @@ def parseReturn(currentCmd, currentAddress, jumps):
 
 # Create bone and load geometry
 def handleNodeCommon(
-    romfile,
+    rom,
     armatureObj,
     parentBoneName,
     finalTransform,
@@ -1003,7 +991,7 @@ def handleNodeCommon(
         if hasMeshData:
             startAddress = decodeSegmentedAddr(segmentedAddr, segmentData)
             parseF3DBinary(
-                romfile,
+                rom,
                 startAddress,
                 bpy.context.scene,
                 bMesh,
@@ -1019,7 +1007,7 @@ def handleNodeCommon(
 
 
 def parseScale(
-    romfile,
+    rom,
     currentAddress,
     currentCmd,
     currentTransform,
@@ -1037,9 +1025,8 @@ def parseScale(
     loadDL = bitMask(currentCmd[1], 7, 1)
     drawLayer = bitMask(currentCmd[1], 0, 4)
 
-    romfile.seek(currentAddress)
     commandSize = 8 + (4 if loadDL else 0)
-    command = romfile.read(commandSize)
+    command = rom.read(currentAddress, commandSize)
 
     scale = int.from_bytes(command[4:8], "big") / 0x10000
     # finalTransform = currentTransform @ mathutils.Matrix.Scale(scale, 4)
@@ -1047,7 +1034,7 @@ def parseScale(
 
     if not ignoreNode:
         boneName = handleNodeCommon(
-            romfile,
+            rom,
             armatureObj,
             parentBoneName,
             finalTransform,
@@ -1072,7 +1059,7 @@ def parseScale(
 
 
 def parseTranslateRotate(
-    romfile,
+    rom,
     currentAddress,
     currentCmd,
     currentTransform,
@@ -1100,8 +1087,7 @@ def parseTranslateRotate(
     if loadDL:
         commandSize += 4
 
-    romfile.seek(currentAddress)
-    command = romfile.read(commandSize)
+    command = rom.read(currentAddress, commandSize)
 
     if fieldLayout == 0:
         pos = readVectorFromShorts(command, 4)
@@ -1128,7 +1114,7 @@ def parseTranslateRotate(
 
     if not ignoreNode:
         boneName = handleNodeCommon(
-            romfile,
+            rom,
             armatureObj,
             parentBoneName,
             finalTransform,
@@ -1158,7 +1144,7 @@ def parseTranslateRotate(
 
 
 def parseTranslate(
-    romfile,
+    rom,
     currentAddress,
     currentCmd,
     currentTransform,
@@ -1181,8 +1167,7 @@ def parseTranslate(
     else:
         commandSize = 8
 
-    romfile.seek(currentAddress)
-    command = romfile.read(commandSize)
+    command = rom.read(currentAddress, commandSize)
 
     pos = readVectorFromShorts(command, 2)
     translation = mathutils.Matrix.Translation(mathutils.Vector(pos))
@@ -1190,7 +1175,7 @@ def parseTranslate(
 
     if not ignoreNode:
         boneName = handleNodeCommon(
-            romfile,
+            rom,
             armatureObj,
             parentBoneName,
             finalTransform,
@@ -1215,7 +1200,7 @@ def parseTranslate(
 
 
 def parseRotate(
-    romfile,
+    rom,
     currentAddress,
     currentCmd,
     currentTransform,
@@ -1238,8 +1223,7 @@ def parseRotate(
     else:
         commandSize = 8
 
-    romfile.seek(currentAddress)
-    command = romfile.read(commandSize)
+    command = rom.read(currentAddress, commandSize)
 
     rot = readEulerVectorFromShorts(command, 2)
     rotation = mathutils.Euler(rot, geoNodeRotateOrder).to_matrix().to_4x4()
@@ -1247,7 +1231,7 @@ def parseRotate(
 
     if not ignoreNode:
         boneName = handleNodeCommon(
-            romfile,
+            rom,
             armatureObj,
             parentBoneName,
             finalTransform,
@@ -1271,7 +1255,7 @@ def parseRotate(
 
 
 def parseBillboard(
-    romfile,
+    rom,
     currentAddress,
     currentCmd,
     currentTransform,
@@ -1294,8 +1278,7 @@ def parseBillboard(
     else:
         commandSize = 8
 
-    romfile.seek(currentAddress)
-    command = romfile.read(commandSize)
+    command = rom.read(currentAddress, commandSize)
 
     pos = readVectorFromShorts(command, 2)
     translation = mathutils.Matrix.Translation(mathutils.Vector(pos))
@@ -1303,7 +1286,7 @@ def parseBillboard(
 
     if not ignoreNode:
         boneName = handleNodeCommon(
-            romfile,
+            rom,
             armatureObj,
             parentBoneName,
             finalTransform,
@@ -1327,14 +1310,11 @@ def parseBillboard(
     return (currentAddress, boneName, finalTransform)
 
 
-def parseShadow(
-    romfile, currentAddress, currentTransform, armatureObj, parentBoneName, ignoreNode, nodeIndex, segmentData
-):
+def parseShadow(rom, currentAddress, currentTransform, armatureObj, parentBoneName, ignoreNode, nodeIndex, segmentData):
     print("SHADOW " + hex(currentAddress))
     commandSize = 8
 
-    romfile.seek(currentAddress)
-    command = romfile.read(commandSize)
+    command = rom.read(currentAddress, commandSize)
     shadowType = int.from_bytes(command[2:4], "big")
     if str(shadowType) not in enumShadowType:
         if shadowType > 12 and shadowType < 50:  # Square Shadow
@@ -1361,13 +1341,10 @@ def parseShadow(
     return currentAddress, boneName, copy.deepcopy(currentTransform)
 
 
-def parseStart(
-    romfile, currentAddress, currentTransform, armatureObj, parentBoneName, ignoreNode, nodeIndex, segmentData
-):
+def parseStart(rom, currentAddress, currentTransform, armatureObj, parentBoneName, ignoreNode, nodeIndex, segmentData):
     print("START " + hex(currentAddress))
 
     commandSize = 4
-    romfile.seek(currentAddress)
 
     if not ignoreNode:
         boneName = format(nodeIndex, "03") + "-start"
@@ -1381,13 +1358,12 @@ def parseStart(
 
 
 def parseStartWithRenderArea(
-    romfile, currentAddress, currentTransform, armatureObj, parentBoneName, ignoreNode, nodeIndex, segmentData
+    rom, currentAddress, currentTransform, armatureObj, parentBoneName, ignoreNode, nodeIndex, segmentData
 ):
     print("START W/ RENDER AREA" + hex(currentAddress))
 
     commandSize = 4
-    romfile.seek(currentAddress)
-    command = romfile.read(commandSize)
+    command = rom.read(currentAddress, commandSize)
     cullingRadius = int.from_bytes(command[2:4], "big") / bpy.context.scene.fast64.sm64.blender_to_sm64_scale
 
     if not ignoreNode:
@@ -1405,14 +1381,13 @@ def parseStartWithRenderArea(
 
 
 def parseFunction(
-    romfile, currentAddress, currentTransform, armatureObj, parentBoneName, ignoreNode, nodeIndex, segmentData
+    rom, currentAddress, currentTransform, armatureObj, parentBoneName, ignoreNode, nodeIndex, segmentData
 ):
     print("Function " + hex(currentAddress))
 
     commandSize = 8
 
-    romfile.seek(currentAddress)
-    command = romfile.read(commandSize)
+    command = rom.read(currentAddress, commandSize)
     asmParam = int.from_bytes(command[2:4], "big", signed=True)
     asmFunc = bytesToHexClean(command[4:8])
 
@@ -1428,12 +1403,11 @@ def parseFunction(
 
 
 def parseHeldObject(
-    romfile, currentAddress, currentTransform, armatureObj, parentBoneName, ignoreNode, nodeIndex, segmentData
+    rom, currentAddress, currentTransform, armatureObj, parentBoneName, ignoreNode, nodeIndex, segmentData
 ):
     print("HELD OBJECT " + hex(currentAddress))
     commandSize = 12
-    romfile.seek(currentAddress)
-    command = romfile.read(commandSize)
+    command = rom.read(currentAddress, commandSize)
 
     pos = readVectorFromShorts(command, 2)
     translation = mathutils.Matrix.Translation(mathutils.Vector(pos))
@@ -1535,12 +1509,12 @@ class SM64_ImportGeolayout(bpy.types.Operator):
         try:
             import_rom_checks(bpy.path.abspath(context.scene.fast64.sm64.import_rom))
 
-            romfileSrc = open(bpy.path.abspath(context.scene.fast64.sm64.import_rom), "rb")
-
             armatureObj = None
 
             # Get segment data
-            levelParsed = parseLevelAtPointer(romfileSrc, level_pointers[levelGeoImport])
+            romfileSrc, levelParsed = openLevelROM(
+                bpy.path.abspath(context.scene.fast64.sm64.import_rom), level_pointers[levelGeoImport]
+            )
             segmentData = levelParsed.segmentData
             geoStart = int(geoImportAddr, 16)
             if context.scene.geoIsSegPtr:
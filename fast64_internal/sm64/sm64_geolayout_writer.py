@@ -1,7 +1,7 @@
 from __future__ import annotations
 import typing
 
-import bpy, mathutils, math, copy, os, shutil, re
+import bpy, mathutils, math, copy, os, re
 from bpy.utils import register_class, unregister_class
 from io import BytesIO
 
@@ -12,7 +12,7 @@ from .sm64_geolayout_bone import getSwitchOptionBone, animatableBoneTypes
 from .sm64_camera import saveCameraSettingsToGeolayout
 from .sm64_f3d_writer import SM64Model, SM64GfxFormatter
 from .sm64_texscroll import modifyTexScrollFiles, modifyTexScrollHeadersGroup
-from .sm64_level_parser import parseLevelAtPointer
+from .sm64_rom_session import SM64_ROMPatchSession
 from .sm64_rom_tweaks import ExtendBank0x04
 from .sm64_utility import export_rom_checks, starSelectWarning
 
@@ -49,7 +49,6 @@ from ..utility import (
     applyRotation,
     getPathAndLevel,
     applyBasicTweaks,
-    tempName,
     getAddressFromRAMAddress,
     prop_split,
     customExportWarning,
@@ -81,6 +80,7 @@ from ..f3d.f3d_writer import (
     saveMeshWithLargeTexturesByFaces,
     saveMeshByFaces,
     getF3DVert,
+    getNormalMatrix,
 )
 
 from ..f3d.f3d_gbi import (
@@ -701,7 +701,8 @@ def saveGeolayoutC(
     modifyTexScrollFiles(exportDir, geoDirPath, scrollData)
 
     if DLFormat == DLFormat.Static:
-        staticData.source += "\n" + dynamicData.source
+        staticData.sourceParts.append("\n")
+        staticData.sourceParts.extend(dynamicData.sourceParts)
         staticData.header = geoData.header + staticData.header + dynamicData.header
     else:
         geoData.source = writeMaterialFiles(
@@ -717,13 +718,13 @@ def saveGeolayoutC(
 
     modelPath = os.path.join(geoDirPath, "model.inc.c")
     modelFile = open(modelPath, "w", newline="\n")
-    modelFile.write(staticData.source)
+    staticData.writeSource(modelFile)
     modelFile.close()
 
     if texSeparate:
         texPath = os.path.join(geoDirPath, "texture.inc.c")
         texFile = open(texPath, "w", newline="\n")
-        texFile.write(texC.source)
+        texC.writeSource(texFile)
         texFile.close()
 
     fModel.freePalettes()
@@ -737,7 +738,7 @@ def saveGeolayoutC(
     # save header
     headerPath = os.path.join(geoDirPath, "geo_header.h")
     cDefFile = open(headerPath, "w", newline="\n")
-    cDefFile.write(staticData.header)
+    staticData.writeHeader(cDefFile)
     cDefFile.close()
 
     fileStatus = None
@@ -2736,6 +2737,7 @@ def saveSkinnedMeshByMaterial(
     # It seems like material setup must be done BEFORE triangles are drawn.
     # Because of this we cannot share verts between materials (?)
     curIndex = 0
+    parentNormalMatrix = getNormalMatrix(parentMatrix)
     for material_index, vertData in notInGroupVertArray:
         material = obj.material_slots[material_index].material
         checkForF3dMaterialInFaces(obj, material)
@@ -2764,6 +2766,7 @@ def saveSkinnedMeshByMaterial(
                     texDimensions,
                     parentMatrix,
                     isPointSampled,
+                    normalMatrix=parentNormalMatrix,
                 )
             )
 
@@ -2794,8 +2797,8 @@ def saveSkinnedMeshByMaterial(
                 convertTextureData,
                 None,
                 triConverterInfo,
-                copy.deepcopy(existingVertData),
-                copy.deepcopy(matRegionDict),
+                existingVertData,
+                matRegionDict,
                 lastMaterialName,
             )
         else:
@@ -2809,8 +2812,8 @@ def saveSkinnedMeshByMaterial(
                 convertTextureData,
                 None,
                 triConverterInfo,
-                copy.deepcopy(existingVertData),
-                copy.deepcopy(matRegionDict),
+                existingVertData,
+                matRegionDict,
                 lastMaterialName,
             )
 
@@ -2846,7 +2849,6 @@ class SM64_ExportGeolayoutObject(ObjectDataExporter):
     # Can also be called from operator search menu (Spacebar)
     def execute(self, context):
         romfileOutput = None
-        tempROM = None
         props = context.scene.fast64.sm64.combined_export
         try:
             obj = None
@@ -2906,14 +2908,14 @@ class SM64_ExportGeolayoutObject(ObjectDataExporter):
                 )
                 self.report({"INFO"}, "Success! Data at " + context.scene.geoInsertableBinaryPath)
             else:
-                tempROM = tempName(context.scene.fast64.sm64.output_rom)
                 export_rom_checks(bpy.path.abspath(context.scene.fast64.sm64.export_rom))
-                romfileExport = open(bpy.path.abspath(context.scene.fast64.sm64.export_rom), "rb")
-                shutil.copy(bpy.path.abspath(context.scene.fast64.sm64.export_rom), bpy.path.abspath(tempROM))
-                romfileExport.close()
-                romfileOutput = open(bpy.path.abspath(tempROM), "rb+")
+                romSession = SM64_ROMPatchSession(
+                    bpy.path.abspath(context.scene.fast64.sm64.export_rom),
+                    bpy.path.abspath(context.scene.fast64.sm64.output_rom),
+                )
+                romfileOutput = romSession.romfile
 
-                levelParsed = parseLevelAtPointer(romfileOutput, level_pointers[context.scene.levelGeoExport])
+                levelParsed = romSession.parseLevelAtPointer(level_pointers[context.scene.levelGeoExport])
                 segmentData = levelParsed.segmentData
 
                 if context.scene.fast64.sm64.extend_bank_4:
@@ -2949,15 +2951,11 @@ class SM64_ExportGeolayoutObject(ObjectDataExporter):
                         textDumpFilePath,
                     )
 
-                romfileOutput.close()
+                romSession.save()
                 bpy.ops.object.select_all(action="DESELECT")
                 obj.select_set(True)
                 context.view_layer.objects.active = obj
 
-                if os.path.exists(bpy.path.abspath(context.scene.fast64.sm64.output_rom)):
-                    os.remove(bpy.path.abspath(context.scene.fast64.sm64.output_rom))
-                os.rename(bpy.path.abspath(tempROM), bpy.path.abspath(context.scene.fast64.sm64.output_rom))
-
                 if context.scene.geoUseBank0:
                     self.report(
                         {"INFO"},
@@ -2997,8 +2995,6 @@ class SM64_ExportGeolayoutObject(ObjectDataExporter):
             if context.scene.fast64.sm64.export_type == "Binary":
                 if romfileOutput is not None:
                     romfileOutput.close()
-                if tempROM is not None and os.path.exists(bpy.path.abspath(tempROM)):
-                    os.remove(bpy.path.abspath(tempROM))
             raisePluginError(self, e)
             return {"CANCELLED"}  # must return a set
 
@@ -3015,7 +3011,6 @@ class SM64_ExportGeolayoutArmature(bpy.types.Operator):
     # Can also be called from operator search menu (Spacebar)
     def execute(self, context):
         romfileOutput = None
-        tempROM = None
         props = context.scene.fast64.sm64.combined_export
         try:
             armatureObj = None
@@ -3106,14 +3101,14 @@ class SM64_ExportGeolayoutArmature(bpy.types.Operator):
                 )
                 self.report({"INFO"}, "Success! Data at " + context.scene.geoInsertableBinaryPath)
             else:
-                tempROM = tempName(context.scene.fast64.sm64.output_rom)
                 export_rom_checks(bpy.path.abspath(context.scene.fast64.sm64.export_rom))
-                romfileExport = open(bpy.path.abspath(context.scene.fast64.sm64.export_rom), "rb")
-                shutil.copy(bpy.path.abspath(context.scene.fast64.sm64.export_rom), bpy.path.abspath(tempROM))
-                romfileExport.close()
-                romfileOutput = open(bpy.path.abspath(tempROM), "rb+")
+                romSession = SM64_ROMPatchSession(
+                    bpy.path.abspath(context.scene.fast64.sm64.export_rom),
+                    bpy.path.abspath(context.scene.fast64.sm64.output_rom),
+                )
+                romfileOutput = romSession.romfile
 
-                levelParsed = parseLevelAtPointer(romfileOutput, level_pointers[context.scene.levelGeoExport])
+                levelParsed = romSession.parseLevelAtPointer(level_pointers[context.scene.levelGeoExport])
                 segmentData = levelParsed.segmentData
 
                 if context.scene.fast64.sm64.extend_bank_4:
@@ -3153,15 +3148,11 @@ class SM64_ExportGeolayoutArmature(bpy.types.Operator):
                         None,
                     )
 
-                romfileOutput.close()
+                romSession.save()
                 bpy.ops.object.select_all(action="DESELECT")
                 armatureObj.select_set(True)
                 context.view_layer.objects.active = armatureObj
 
-                if os.path.exists(bpy.path.abspath(context.scene.fast64.sm64.output_rom)):
-                    os.remove(bpy.path.abspath(context.scene.fast64.sm64.output_rom))
-                os.rename(bpy.path.abspath(tempROM), bpy.path.abspath(context.scene.fast64.sm64.output_rom))
-
                 if context.scene.geoUseBank0:
                     self.report(
                         {"INFO"},
@@ -3199,8 +3190,6 @@ class SM64_ExportGeolayoutArmature(bpy.types.Operator):
             if context.scene.fast64.sm64.export_type == "Binary":
                 if romfileOutput is not None:
                     romfileOutput.close()
-                if tempROM is not None and os.path.exists(bpy.path.abspath(tempROM)):
-                    os.remove(bpy.path.abspath(tempROM))
             if armatureObj is not None:
                 armatureObj.select_set(True)
                 context.view_layer.objects.active = armatureObj
@@ -1,8 +1,11 @@
 import copy
+import struct
 from .sm64_constants import mainLevelLoadScriptSegment, loadSegmentAddresses
+from .sm64_compression import loadCompressedSegment
 
 from ..utility import (
     PluginError,
+    ROMView,
     decodeSegmentedAddr,
     writeVectorToShorts,
     writeFloatToShort,
@@ -43,49 +46,50 @@ from .sm64_level_constants import (
 )
 
 
-def parseLevelAtPointer(romfile, pointerAddress):
-    segmentData = parseCommonSegmentLoad(romfile)
+# Segment load commands: command type, segment, segment start, segment end
+LOAD_SEGMENT_STRUCT = struct.Struct(">B2xBII")
 
-    romfile.seek(pointerAddress)
-    command = romfile.read(16)
-    segment = command[3]
-    segmentStart = int.from_bytes(command[4:8], "big")
-    segmentEnd = int.from_bytes(command[8:12], "big")
 
+def readLevelCommand(rom: ROMView, address: int):
+    """Level script commands store their length in their second byte"""
+    return rom.read(address, rom.readU8(address + 1))
+
+
+def parseLevelAtPointer(rom: ROMView, pointerAddress, loadCompressed=False):
+    """
+    If loadCompressed is set, MIO0/Yay0 segments are decompressed past the end of rom,
+    which must then be backed by a bytearray, and their segment ranges point to the decompressed data.
+    """
+    segmentData = parseCommonSegmentLoad(rom, loadCompressed)
+
+    _, segment, segmentStart, segmentEnd = rom.unpack(LOAD_SEGMENT_STRUCT, pointerAddress)
     segmentData[segment] = (segmentStart, segmentEnd)
 
-    startAddress = decodeSegmentedAddr(command[12:16], segmentData)
+    startAddress = rom.readSegmentedAddr(pointerAddress + 12, segmentData)
 
-    parsedLevel = parseLevel(romfile, startAddress, segmentData)
+    parsedLevel = parseLevel(rom, startAddress, segmentData, loadCompressed)
     for segment, interval in parsedLevel.segmentData.items():
         print("Segment " + format(segment, "#04x") + ": " + hex(interval[0]) + " - " + hex(interval[1]))
 
     return parsedLevel
 
 
-def parseCommonSegmentLoad(romfile):
+def parseCommonSegmentLoad(rom: ROMView, loadCompressed=False):
     segmentData = copy.deepcopy(mainLevelLoadScriptSegment)
     for segment, pointer in loadSegmentAddresses.items():
-        romfile.seek(pointer)
-        command = romfile.read(12)
-
-        segment = command[3]
-        segmentStart = int.from_bytes(command[4:8], "big")
-        segmentEnd = int.from_bytes(command[8:12], "big")
+        commandType, segment, segmentStart, segmentEnd = rom.unpack(LOAD_SEGMENT_STRUCT, pointer)
 
         segmentData[segment] = (segmentStart, segmentEnd)
+        if loadCompressed and commandType in (L_LOAD_MIO0_SEG, L_LOAD_MIO0_TEX):
+            segmentData[segment] = loadCompressedSegment(rom, segmentStart, segmentEnd) or segmentData[segment]
 
     return segmentData
 
 
 # second byte = command length
-def parseLevel(romfile, startAddress, segmentData):
+def parseLevel(rom: ROMView, startAddress, segmentData, loadCompressed=False):
     currentAddress = startAddress
-
-    romfile.seek(currentAddress)
-    currentCmd = romfile.read(2)
-    romfile.seek(currentAddress)  # second seek is because reading moves read pointer forward
-    currentCmd = romfile.read(currentCmd[1])
+    currentCmd = readLevelCommand(rom, currentAddress)
     # currentAddress += currentCmd[1]
 
     scriptStack = [currentAddress]
@@ -108,10 +112,7 @@ def parseLevel(romfile, startAddress, segmentData):
 
         elif currentCmd[0] == L_POP:
             currentAddress = scriptStack.pop()
-            romfile.seek(currentAddress)
-            currentCmd = romfile.read(2)
-            romfile.seek(currentAddress)
-            currentCmd = romfile.read(currentCmd[1])
+            currentCmd = readLevelCommand(rom, currentAddress)
             currentAddress += currentCmd[1]
             # print([hex(value) for value in scriptStack])
 
@@ -119,10 +120,12 @@ def parseLevel(romfile, startAddress, segmentData):
             pass
 
         elif currentCmd[0] == L_LOAD_ROM_SEG or currentCmd[0] == L_LOAD_MIO0_SEG or currentCmd[0] == L_LOAD_MIO0_TEX:
-            segmentData[currentCmd[3]] = [
-                int.from_bytes(currentCmd[4:8], "big"),
-                int.from_bytes(currentCmd[8:12], "big"),
-            ]
+            _, segment, segmentStart, segmentEnd = LOAD_SEGMENT_STRUCT.unpack_from(currentCmd)
+            segmentData[segment] = [segmentStart, segmentEnd]
+            if loadCompressed and currentCmd[0] != L_LOAD_ROM_SEG:
+                decompressedRange = loadCompressedSegment(rom, segmentStart, segmentEnd)
+                if decompressedRange is not None:
+                    segmentData[segment] = decompressedRange
 
         elif currentCmd[0] == L_AREA_START:
             if currentArea is not currentLevel.nonArea:
@@ -183,10 +186,7 @@ def parseLevel(romfile, startAddress, segmentData):
 
         if currentCmd[0] != L_PUSH and currentCmd[0] != L_JUMP and currentCmd[0] != L_POP:
             currentAddress += currentCmd[1]
-        romfile.seek(currentAddress)
-        currentCmd = romfile.read(2)
-        romfile.seek(currentAddress)
-        currentCmd = romfile.read(currentCmd[1])
+        currentCmd = readLevelCommand(rom, currentAddress)
         # currentAddress += currentCmd[1]
 
     return currentLevel
@@ -0,0 +1,100 @@
+import copy
+import hashlib
+import io
+import os
+
+from ..utility import ROMView, tempName
+from .sm64_level_parser import SM64_Level, parseLevelAtPointer
+
+
+class SM64_ROMData:
+    def __init__(self, path: str, data: bytes):
+        self.path = path
+        self.data = data
+        self.hash = hashlib.sha1(data).hexdigest()
+
+
+# Only the last ROM is kept, extended ROMs are 64 MB
+loadedROM: tuple[tuple[str, int, int], SM64_ROMData] | None = None
+# (level pointer, decompressed) : (parsed level, data appended past the end of the ROM by decompression),
+# for the ROM with hash parsedLevelsHash. Parsed levels are never modified, copies are handed out instead.
+parsedLevels: dict[tuple[int, bool], tuple[SM64_Level, bytes]] = {}
+parsedLevelsHash: str | None = None
+
+
+def loadROMData(path: str):
+    """Reads the ROM at path, or reuses the last read if the file hasn't changed since"""
+    global loadedROM
+
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    if loadedROM is None or loadedROM[0] != key:
+        with open(path, "rb") as romfile:
+            loadedROM = (key, SM64_ROMData(path, romfile.read()))
+    return loadedROM[1]
+
+
+def getCachedLevel(romData: SM64_ROMData, pointerAddress: int, loadCompressed: bool):
+    global parsedLevelsHash
+
+    # Levels of a modified or different ROM will not be asked for again
+    if parsedLevelsHash != romData.hash:
+        parsedLevels.clear()
+        parsedLevelsHash = romData.hash
+
+    key = (pointerAddress, loadCompressed)
+    if key not in parsedLevels:
+        rom = ROMView(bytearray(romData.data) if loadCompressed else romData.data)
+        parsedLevel = parseLevelAtPointer(rom, pointerAddress, loadCompressed)
+        parsedLevels[key] = (parsedLevel, bytes(rom.data[len(romData.data) :]))
+    return parsedLevels[key]
+
+
+def getParsedLevel(romData: SM64_ROMData, pointerAddress: int):
+    """Same as parseLevelAtPointer on the unmodified ROM, cached by ROM hash and level"""
+    return copy.deepcopy(getCachedLevel(romData, pointerAddress, False)[0])
+
+
+def getLevelSegmentData(path: str, pointerAddress: int):
+    """Segment table of the level at pointerAddress in the ROM at path, without decompressing segments"""
+    return copy.deepcopy(getCachedLevel(loadROMData(path), pointerAddress, False)[0].segmentData)
+
+
+def openLevelROM(path: str, pointerAddress: int):
+    """
+    Returns an in memory copy of the ROM at path with the compressed segments of the level at pointerAddress
+    decompressed past its end, and the parsed level, whose segment ranges point to the decompressed data.
+    """
+    romData = loadROMData(path)
+    parsedLevel, decompressedData = getCachedLevel(romData, pointerAddress, True)
+    return ROMView(bytearray(romData.data) + decompressedData), copy.deepcopy(parsedLevel)
+
+
+class SM64_ROMPatchSession:
+    """
+    Binary export into an in memory copy of the export ROM, instead of copying the whole ROM to a temp file.
+    romfile is used like the opened temp ROM was, and save() writes the result to the output ROM at once.
+    If the export fails before save(), the output ROM is left untouched.
+    """
+
+    def __init__(self, exportPath: str, outputPath: str):
+        self.romData = loadROMData(exportPath)
+        self.outputPath = os.path.abspath(outputPath)
+        # BytesIO only copies the data on the first write
+        self.romfile = io.BytesIO(self.romData.data)
+
+    def parseLevelAtPointer(self, pointerAddress: int):
+        """Same as parseLevelAtPointer on the unmodified ROM, cached by ROM hash and level"""
+        return getParsedLevel(self.romData, pointerAddress)
+
+    def save(self):
+        tempPath = tempName(self.outputPath)
+        try:
+            with open(tempPath, "wb") as tempFile:
+                tempFile.write(self.romfile.getbuffer())
+            os.replace(tempPath, self.outputPath)
+        finally:
+            if os.path.exists(tempPath):
+                os.remove(tempPath)
+        self.romfile.close()
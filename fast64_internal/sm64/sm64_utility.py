@@ -3,7 +3,7 @@ import bpy
 from bpy.types import UILayout
 
 from ..utility import PluginError, filepath_checks, run_and_draw_errors, multilineLabel, prop_split
-from .sm64_function_map import func_map
+from .sm64_function_map import has_refresh, get_func_name
 
 
 def starSelectWarning(operator, fileStatus):
@@ -116,9 +116,9 @@ def convert_addr_to_func(addr: str):
     refresh_version: str = bpy.context.scene.fast64.sm64.refresh_version
     if refresh_version.startswith("HackerSM64"):  # hacker uses refresh 13
         refresh_version = "Refresh 13"
-    assert refresh_version in func_map, "Refresh version not found in function map"
-    refresh_func_map = func_map[refresh_version]
-    if addr.lower() in refresh_func_map:
-        return refresh_func_map[addr.lower()]
+    assert has_refresh(refresh_version), "Refresh version not found in function map"
+    func_name = get_func_name(refresh_version, addr)
+    if func_name is not None:
+        return func_name
     else:
         return addr
@@ -12,7 +12,7 @@ from ...utility import parentObject, intToHex, bytesToHex
 
 from ..sm64_constants import level_pointers, levelIDNames, level_enums
 from ..sm64_utility import import_rom_checks, int_from_str
-from ..sm64_level_parser import parseLevelAtPointer
+from ..sm64_rom_session import getLevelSegmentData
 from ..sm64_geolayout_utility import createBoneGroups
 from ..sm64_geolayout_parser import generateMetarig
 
@@ -40,9 +40,7 @@ class SM64_AddrConv(OperatorBase):
         addr = int_from_str(self.addr)
         import_rom_path = abspath(self.rom)
         import_rom_checks(import_rom_path)
-        with open(import_rom_path, "rb") as romfile:
-            level_parsed = parseLevelAtPointer(romfile, level_pointers[self.level])
-            segment_data = level_parsed.segmentData
+        segment_data = getLevelSegmentData(import_rom_path, level_pointers[self.level])
         if self.option == "TO_VIR":
             result = intToHex(decodeSegmentedAddr(addr.to_bytes(4, "big"), segment_data))
             self.report({"INFO"}, f"Virtual pointer is {result}")
@@ -1,5 +1,6 @@
 from pathlib import Path
-import bpy, random, string, os, math, traceback, re, os, mathutils, ast, operator, inspect
+import bpy, random, string, os, math, traceback, re, os, mathutils, ast, operator, inspect, struct, functools, mmap
+import numpy as np
 from math import pi, ceil, degrees, radians, copysign
 from mathutils import *
 from .utility_anim import *
@@ -366,34 +367,70 @@ def propertyGroupEquals(oldProp, newProp):
 
 def writeCData(data, headerPath, sourcePath):
     sourceFile = open(sourcePath, "w", newline="\n", encoding="utf-8")
-    sourceFile.write(data.source)
+    data.writeSource(sourceFile)
     sourceFile.close()
 
     headerFile = open(headerPath, "w", newline="\n", encoding="utf-8")
-    headerFile.write(data.header)
+    data.writeHeader(headerFile)
     headerFile.close()
 
 
 def writeCDataSourceOnly(data, sourcePath):
     sourceFile = open(sourcePath, "w", newline="\n", encoding="utf-8")
-    sourceFile.write(data.source)
+    data.writeSource(sourceFile)
     sourceFile.close()
 
 
 def writeCDataHeaderOnly(data, headerPath):
     headerFile = open(headerPath, "w", newline="\n", encoding="utf-8")
-    headerFile.write(data.header)
+    data.writeHeader(headerFile)
     headerFile.close()
 
 
+def joinCParts(parts: list[str]):
+    # Keep the joined string, so reading the same data again doesn't join it again
+    if len(parts) > 1:
+        parts[:] = ["".join(parts)]
+    return parts[0] if len(parts) > 0 else ""
+
+
 class CData:
+    """
+    C source and header text.
+    The text is stored as lists of parts that are only joined when source or header is read,
+    so appending large blocks of data doesn't copy everything written before it.
+    Use writeSource/writeHeader to stream the parts to a file without joining them.
+    """
+
     def __init__(self):
-        self.source = ""
-        self.header = ""
+        self.sourceParts: list[str] = []
+        self.headerParts: list[str] = []
+
+    @property
+    def source(self) -> str:
+        return joinCParts(self.sourceParts)
+
+    @source.setter
+    def source(self, value: str):
+        self.sourceParts = [value]
+
+    @property
+    def header(self) -> str:
+        return joinCParts(self.headerParts)
+
+    @header.setter
+    def header(self, value: str):
+        self.headerParts = [value]
 
     def append(self, other):
-        self.source += other.source
-        self.header += other.header
+        self.sourceParts.extend(other.sourceParts)
+        self.headerParts.extend(other.headerParts)
+
+    def writeSource(self, file):
+        file.writelines(self.sourceParts)
+
+    def writeHeader(self, file):
+        file.writelines(self.headerParts)
 
 
 class CScrollData(CData):
@@ -599,6 +636,15 @@ def colorToLuminance(color: mathutils.Color | list[float] | Vector):
     return RGB_TO_LUM_COEF.dot(color[:3])
 
 
+def colorToLuminanceArray(colors: np.ndarray) -> np.ndarray:
+    """
+    Vectorized colorToLuminance over the last axis of a float array, matching it bit for bit.
+    mathutils' dot multiplies in float32 and accumulates in double, starting from the last component.
+    """
+    products = (colors[..., :3].astype(np.float32) * np.array(RGB_TO_LUM_COEF, dtype=np.float32)).astype(np.float64)
+    return (products[..., 2] + products[..., 1]) + products[..., 0]
+
+
 def getIA16Tuple(color):
     intensity = colorToLuminance(color[0:3])
     alpha = color[3]
@@ -1427,6 +1473,75 @@ def getSegment(address, segmentData):
     raise PluginError("Address " + hex(address) + " is not found in any of the provided segments.")
 
 
+class ROMView:
+    """
+    Random access to ROM data for the binary parsers, instead of seeking and reading a file for every command.
+    data is either bytes, a read only mmap (see openFile),
+    or a bytearray when decompressed segments need to be appended to it (see appendSegment).
+    """
+
+    U16 = struct.Struct(">H")
+    S16 = struct.Struct(">h")
+    U32 = struct.Struct(">I")
+
+    def __init__(self, data: Union[bytes, bytearray, mmap.mmap]):
+        self.data = data
+
+    @staticmethod
+    def openFile(path: str):
+        """Memory maps the file at path, so only the parts that are parsed get read"""
+        with open(path, "rb") as romfile:
+            return ROMView(mmap.mmap(romfile.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+
+    def __len__(self):
+        return len(self.data)
+
+    def read(self, address: int, size: int) -> bytes:
+        # Like reading a file, this is shorter than size past the end of the data
+        return bytes(self.data[address : address + size])
+
+    def unpack(self, fmt: struct.Struct, address: int) -> tuple:
+        return fmt.unpack_from(self.data, address)
+
+    def readU8(self, address: int) -> int:
+        return self.data[address]
+
+    def readU16(self, address: int) -> int:
+        return ROMView.U16.unpack_from(self.data, address)[0]
+
+    def readS16(self, address: int) -> int:
+        return ROMView.S16.unpack_from(self.data, address)[0]
+
+    def readU32(self, address: int) -> int:
+        return ROMView.U32.unpack_from(self.data, address)[0]
+
+    def readSegmentedAddr(self, address: int, segmentData) -> int:
+        """Reads the segmented address at address, and returns the ROM address it points to"""
+        return decodeSegmentedAddr(self.data[address : address + 4], segmentData)
+
+    def appendSegment(self, data: bytes):
+        """
+        Appends data past the end of the ROM, 16 byte aligned like segments loaded from the ROM are.
+        Returns the range of the appended data, to use as its segment range.
+        """
+        if not isinstance(self.data, bytearray):
+            raise PluginError("Segments can only be appended to an in memory copy of the ROM.")
+        self.data += bytes(-len(self.data) % 0x10)
+        segmentStart = len(self.data)
+        self.data += data
+        return [segmentStart, len(self.data)]
+
+
 # Position
 def readVectorFromShorts(command, offset):
     return [readFloatFromShort(command, valueOffset) for valueOffset in range(offset, offset + 6, 2)]
@@ -2039,6 +2154,50 @@ CRC64_TABLE = [
 ]
 
 
+def make_crc64_slice_tables() -> list[list[int]]:
+    """
+    Tables for processing 8 bytes per step (slicing-by-8).
+    tables[k][i] is the CRC of byte i followed by k zero bytes, so tables[0] is CRC64_TABLE.
+    """
+    tables = [CRC64_TABLE]
+    for _ in range(7):
+        tables.append([CRC64_TABLE[value >> 56] ^ ((value << 8) & 0xFFFFFFFFFFFFFFFF) for value in tables[-1]])
+    return tables
+
+
+CRC64_SLICE_TABLES = make_crc64_slice_tables()
+
+
+def process_crc64(buf: bytes, crc: int) -> int:
+    """
+    Runs buf through the CRC64 table without inverting the result.
+    Equivalent to the byte by byte loop, but processes 8 bytes per step.
+    """
+    t0, t1, t2, t3, t4, t5, t6, t7 = CRC64_SLICE_TABLES
+    end = len(buf) - len(buf) % 8
+
+    for (value,) in struct.iter_unpack(">Q", memoryview(buf)[:end]):
+        crc ^= value
+        crc = (
+            t7[crc >> 56]
+            ^ t6[(crc >> 48) & 0xFF]
+            ^ t5[(crc >> 40) & 0xFF]
+            ^ t4[(crc >> 32) & 0xFF]
+            ^ t3[(crc >> 24) & 0xFF]
+            ^ t2[(crc >> 16) & 0xFF]
+            ^ t1[(crc >> 8) & 0xFF]
+            ^ t0[crc & 0xFF]
+        )
+
+    for byte in buf[end:]:
+        # Extract high byte of crc, XOR with current byte, use as table index
+        table_index = ((crc >> 56) & 0xFF) ^ byte
+        # Update crc: table lookup XOR with left-shifted crc
+        crc = t0[table_index] ^ ((crc << 8) & 0xFFFFFFFFFFFFFFFF)
+
+    return crc
+
+
 def update_crc64(buf: bytes, crc: int) -> int:
     """
     Update CRC64 with buffer data.
@@ -2050,16 +2209,14 @@ def update_crc64(buf: bytes, crc: int) -> int:
     Returns:
         Updated CRC value (inverted)
     """
-    for byte in buf:
-        # Extract high byte of crc, XOR with current byte, use as table index
-        table_index = ((crc >> 56) & 0xFF) ^ byte
-        # Update crc: table lookup XOR with left-shifted crc
-        crc = CRC64_TABLE[table_index] ^ ((crc << 8) & 0xFFFFFFFFFFFFFFFF)
+    crc = process_crc64(buf, crc)
     
     # Return bitwise NOT of crc (masked to 64 bits)
     return (~crc) & 0xFFFFFFFFFFFFFFFF
 
 
+# Resource paths are hashed again every time something references them, so remember the results
+@functools.lru_cache(maxsize=None)
 def crc64(text: str) -> str:
     """
     Compute CRC64 hash of a string.
@@ -2079,13 +2236,8 @@ def crc64(text: str) -> str:
     # Convert string to bytes using UTF-8 encoding
     buf = text.encode('utf-8')
     
-    # Initialize CRC
-    crc = INITIAL_CRC64
-    
-    # Process each byte (matching C++ CRC64 implementation)
-    for byte in buf:
-        table_index = ((crc >> 56) & 0xFF) ^ byte
-        crc = CRC64_TABLE[table_index] ^ ((crc << 8) & 0xFFFFFFFFFFFFFFFF)
+    # Process the bytes from the initial CRC (matching C++ CRC64 implementation)
+    crc = process_crc64(buf, INITIAL_CRC64)
     
     # Return WITHOUT inversion (matching C++ CRC64, not update_crc64)
     # Return as hex string without '0x' prefix, lowercase
@@ -1,4 +1,4 @@
-import bpy, math, mathutils
+import bpy, math, mathutils, re
 from bpy.utils import register_class, unregister_class
 
 from typing import TYPE_CHECKING
@@ -200,6 +200,196 @@ def stashActionInArmature(armatureObj: bpy.types.Object, action: bpy.types.Actio
     track.strips.new(action.name, int(action.frame_range[0]), action)
 
 
+class ArmaturePoseSampler:
+    """
+    Evaluates an armature's pose frame by frame for animation export.
+    When only the action can affect the pose, bone matrices are computed directly from the action's F-curves,
+    which avoids a full depsgraph evaluation of the scene on every frame.
+    Otherwise (constraints, drivers, NLA blending, ...) this falls back to scene.frame_set.
+
+    Usage:
+        with ArmaturePoseSampler(armatureObj, action) as sampler:
+            for frame in range(frame_start, frame_start + frame_count):
+                sampler.setFrame(frame)
+                sampler.getMatrix(boneName)
+    """
+
+    poseBonePathRegex = re.compile(r'^pose\.bones\["((?:[^"\\]|\\.)*)"\]\.(\w+)$')
+    transformChannels = {"location", "rotation_quaternion", "rotation_euler", "rotation_axis_angle", "scale"}
+
+    def __init__(self, armatureObj: bpy.types.Object, action: bpy.types.Action):
+        self.armatureObj = armatureObj
+        self.action = action
+        self.startFrame = bpy.context.scene.frame_current
+        self.frame = None
+
+        # bone name : {channel : [F-curve or None per index]}, only set when sampling F-curves
+        self.boneCurves: dict[str, dict[str, list]] | None = None
+        # data path : F-curve, for non pose bone properties
+        self.propertyCurves: dict[str, bpy.types.FCurve] = {}
+        # bone name : matrix, cleared every frame
+        self.poseMatrices: dict[str, mathutils.Matrix] = {}
+        self.basisMatrices: dict[str, mathutils.Matrix] = {}
+
+        if self.canSampleFCurves():
+            self.boneCurves = {}
+            for fcurve in self.getActiveFCurves(action):
+                match = self.poseBonePathRegex.match(fcurve.data_path)
+                if match is None:
+                    if fcurve.array_index == 0:
+                        self.propertyCurves[fcurve.data_path] = fcurve
+                    continue
+                boneName = re.sub(r"\\(.)", r"\1", match.group(1))
+                channels = self.boneCurves.setdefault(boneName, {})
+                curves = channels.setdefault(match.group(2), [None] * 4)
+                if fcurve.array_index < len(curves):
+                    curves[fcurve.array_index] = fcurve
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        if self.boneCurves is None:
+            bpy.context.scene.frame_set(self.startFrame)
+
+    @staticmethod
+    def getActiveFCurves(action: bpy.types.Action):
+        return [
+            fcurve for fcurve in action.fcurves if not fcurve.mute and (fcurve.group is None or not fcurve.group.mute)
+        ]
+
+    def canSampleFCurves(self):
+        armatureObj = self.armatureObj
+        animData = armatureObj.animation_data
+        if (
+            getattr(self.action, "fcurves", None) is None
+            or len(getattr(self.action, "slots", ())) > 1
+            or animData is None
+            or animData.action != self.action
+            or animData.use_tweak_mode
+            or animData.action_influence != 1.0
+            or animData.action_blend_type != "REPLACE"
+            or animData.action_extrapolation != "HOLD"
+            or len(animData.drivers) > 0
+            or armatureObj.data.pose_position != "POSE"
+        ):
+            return False
+
+        armatureAnimData = armatureObj.data.animation_data
+        if armatureAnimData is not None and (armatureAnimData.action is not None or len(armatureAnimData.drivers) > 0):
+            return False
+
+        if any(len(poseBone.constraints) > 0 for poseBone in armatureObj.pose.bones):
+            return False
+
+        animatedPaths = set()
+        for fcurve in self.getActiveFCurves(self.action):
+            match = self.poseBonePathRegex.match(fcurve.data_path)
+            if match is not None and match.group(2) not in self.transformChannels:
+                return False
+            animatedPaths.add((fcurve.data_path, fcurve.array_index))
+
+        # NLA strips below the action are only hidden if the action replaces every channel they animate
+        # (stashActionInArmature leaves a track for each exported action)
+        if animData.use_nla:
+            for track in animData.nla_tracks:
+                if track.mute:
+                    continue
+                for strip in track.strips:
+                    if strip.mute or strip.action is None:
+                        continue
+                    if getattr(strip.action, "fcurves", None) is None:
+                        return False
+                    for fcurve in self.getActiveFCurves(strip.action):
+                        if (fcurve.data_path, fcurve.array_index) not in animatedPaths:
+                            return False
+
+        return True
+
+    def setFrame(self, frame: int):
+        self.frame = frame
+        if self.boneCurves is None:
+            bpy.context.scene.frame_set(frame)
+        else:
+            self.poseMatrices.clear()
+            self.basisMatrices.clear()
+
+    def evaluateChannel(self, curves: list, values):
+        values = list(values)
+        for i in range(len(values)):
+            if curves[i] is not None:
+                values[i] = curves[i].evaluate(self.frame)
+        return values
+
+    def getMatrixBasis(self, boneName: str) -> mathutils.Matrix:
+        """Equivalent of PoseBone.matrix_basis"""
+        poseBone = self.armatureObj.pose.bones[boneName]
+        if self.boneCurves is None:
+            return poseBone.matrix_basis
+        if boneName in self.basisMatrices:
+            return self.basisMatrices[boneName]
+
+        # Same as BKE_pchan_to_mat4, with animated channels replaced by their F-curve values
+        channels = self.boneCurves.get(boneName, {})
+        noCurves = [None] * 4
+        location = self.evaluateChannel(channels.get("location", noCurves), poseBone.location)
+        scale = self.evaluateChannel(channels.get("scale", noCurves), poseBone.scale)
+        if poseBone.rotation_mode == "QUATERNION":
+            values = self.evaluateChannel(channels.get("rotation_quaternion", noCurves), poseBone.rotation_quaternion)
+            rotation = mathutils.Quaternion(values).normalized().to_matrix()
+        elif poseBone.rotation_mode == "AXIS_ANGLE":
+            values = self.evaluateChannel(channels.get("rotation_axis_angle", noCurves), poseBone.rotation_axis_angle)
+            axis = mathutils.Vector(values[1:])
+            if axis.length > 0:
+                rotation = mathutils.Matrix.Rotation(values[0], 3, axis.normalized())
+            else:
+                rotation = mathutils.Matrix.Identity(3)
+        else:
+            values = self.evaluateChannel(channels.get("rotation_euler", noCurves), poseBone.rotation_euler)
+            rotation = mathutils.Euler(values, poseBone.rotation_mode).to_matrix()
+
+        # connected bones ignore their location
+        if poseBone.bone.use_connect:
+            location = None
+
+        matrix = mathutils.Matrix.LocRotScale(location, rotation, scale)
+        self.basisMatrices[boneName] = matrix
+        return matrix
+
+    def getMatrix(self, boneName: str) -> mathutils.Matrix:
+        """Equivalent of PoseBone.matrix, the final bone matrix in armature space"""
+        if self.boneCurves is None:
+            return self.armatureObj.pose.bones[boneName].matrix
+        if boneName in self.poseMatrices:
+            return self.poseMatrices[boneName]
+
+        bone = self.armatureObj.data.bones[boneName]
+        basis = self.getMatrixBasis(boneName)
+        if bone.parent is not None:
+            matrix = bone.convert_local_to_pose(
+                basis,
+                bone.matrix_local,
+                parent_matrix=self.getMatrix(bone.parent.name),
+                parent_matrix_local=bone.parent.matrix_local,
+            )
+        else:
+            matrix = bone.convert_local_to_pose(basis, bone.matrix_local)
+        self.poseMatrices[boneName] = matrix
+        return matrix
+
+    def getIntProperty(self, dataPath: str) -> int:
+        """Value of an integer property of the armature object, e.g. "ootLinkTextureAnim.eyes" """
+        ownerPath, _, propName = dataPath.rpartition(".")
+        owner = self.armatureObj.path_resolve(ownerPath) if ownerPath else self.armatureObj
+        fcurve = self.propertyCurves.get(dataPath)
+        if self.boneCurves is None or fcurve is None:
+            return getattr(owner, propName)
+
+        # F-curves on integer properties already evaluate to rounded values, the property range is applied on write
+        prop = owner.bl_rna.properties[propName]
+        return max(prop.hard_min, min(prop.hard_max, int(fcurve.evaluate(self.frame))))
+
+
 classes = (ArmatureApplyWithMeshOperator,)
 
 
@@ -12,6 +12,7 @@ from ....utility_anim import (
     squashFramesIfAllSame,
     getFrameInterval,
     stashActionInArmature,
+    ArmaturePoseSampler,
 )
 
 from ...utility import (
@@ -21,7 +22,7 @@ from ...utility import (
 )
 
 
-def ootGetAnimBoneRot(bone, poseBone, convertTransformMatrix, isRoot):
+def ootGetAnimBoneRot(bone, poseMatrix, parentPoseMatrix, convertTransformMatrix, isRoot):
     # OoT draws limbs like this:
     # limbMatrix = parentLimbMatrix @ limbFixedTranslationMatrix @ animRotMatrix
     # There is no separate rest position rotation; an animation rotation of 0
@@ -33,8 +34,9 @@ def ootGetAnimBoneRot(bone, poseBone, convertTransformMatrix, isRoot):
     # modeled along a forearm bone, so when the bone is set to 0 rotation
     # (sticking up), the forearm mesh also sticks up.
     #
-    # poseBone.matrix is the final bone matrix in object space after constraints
-    # and drivers, which is ultimately the transformation we want to encode.
+    # poseMatrix (poseBone.matrix) is the final bone matrix in object space after
+    # constraints and drivers, which is ultimately the transformation we want to encode.
+    # parentPoseMatrix is the same for the parent bone, or None for the root.
     # bone.matrix_local is the edit-mode bone matrix in object space,
     # effectively the rest position.
     # Limbs are exported with a transformation of bone.matrix_local.inverted()
@@ -64,8 +66,8 @@ def ootGetAnimBoneRot(bone, poseBone, convertTransformMatrix, isRoot):
     inverseTranslationMatrix = mathutils.Matrix.Translation(origTranslation).inverted()
     animMatrix = (
         inverseTranslationMatrix
-        @ (poseBone.parent.matrix.inverted() if poseBone.parent is not None else mathutils.Matrix.Identity(4))
-        @ poseBone.matrix
+        @ (parentPoseMatrix.inverted() if parentPoseMatrix is not None else mathutils.Matrix.Identity(4))
+        @ poseMatrix
     )
     finalTranslation, finalRotation, finalScale = animMatrix.decompose()
     if isRoot:
@@ -85,6 +87,12 @@ def ootGetAnimBoneRot(bone, poseBone, convertTransformMatrix, isRoot):
     return finalRotation
 
 
+def ootGetSampledAnimBoneRot(armatureObj, sampler: ArmaturePoseSampler, boneName, convertTransformMatrix, isRoot):
+    bone = armatureObj.data.bones[boneName]
+    parentPoseMatrix = sampler.getMatrix(bone.parent.name) if bone.parent is not None else None
+    return ootGetAnimBoneRot(bone, sampler.getMatrix(boneName), parentPoseMatrix, convertTransformMatrix, isRoot)
+
+
 def ootConvertNonLinkAnimationData(anim, armatureObj, convertTransformMatrix, *, frame_start, frame_count):
     checkForStartBone(armatureObj)
     bonesToProcess = [getStartBone(armatureObj)]
@@ -114,30 +122,25 @@ def ootConvertNonLinkAnimationData(anim, armatureObj, convertTransformMatrix, *,
         [ValueFrameData(i, 0, []), ValueFrameData(i, 1, []), ValueFrameData(i, 2, [])] for i in range(len(animBones))
     ]
 
-    currentFrame = bpy.context.scene.frame_current
-    for frame in range(frame_start, frame_start + frame_count):
-        bpy.context.scene.frame_set(frame)
-        rootBone = armatureObj.data.bones[animBones[0]]
-        rootPoseBone = armatureObj.pose.bones[animBones[0]]
-
-        # Convert Z-up to Y-up for root translation animation
-        translation = (
-            mathutils.Quaternion((1, 0, 0), math.radians(-90.0))
-            @ (convertTransformMatrix @ rootPoseBone.matrix).decompose()[0]
-        )
-        saveTranslationFrame(translationData, translation)
+    with ArmaturePoseSampler(armatureObj, anim) as sampler:
+        for frame in range(frame_start, frame_start + frame_count):
+            sampler.setFrame(frame)
 
-        for boneIndex in range(len(animBones)):
-            boneName = animBones[boneIndex]
-            currentBone = armatureObj.data.bones[boneName]
-            currentPoseBone = armatureObj.pose.bones[boneName]
-
-            saveQuaternionFrame(
-                rotationData[boneIndex],
-                ootGetAnimBoneRot(currentBone, currentPoseBone, convertTransformMatrix, boneIndex == 0),
+            # Convert Z-up to Y-up for root translation animation
+            translation = (
+                mathutils.Quaternion((1, 0, 0), math.radians(-90.0))
+                @ (convertTransformMatrix @ sampler.getMatrix(animBones[0])).decompose()[0]
             )
+            saveTranslationFrame(translationData, translation)
+
+            for boneIndex in range(len(animBones)):
+                saveQuaternionFrame(
+                    rotationData[boneIndex],
+                    ootGetSampledAnimBoneRot(
+                        armatureObj, sampler, animBones[boneIndex], convertTransformMatrix, boneIndex == 0
+                    ),
+                )
 
-    bpy.context.scene.frame_set(currentFrame)
     squashFramesIfAllSame(translationData)
     for frameData in rotationData:
         squashFramesIfAllSame(frameData)
@@ -176,38 +179,33 @@ def ootConvertLinkAnimationData(anim, armatureObj, convertTransformMatrix, *, fr
 
     frameData = []
 
-    currentFrame = bpy.context.scene.frame_current
-    for frame in range(frame_start, frame_start + frame_count):
-        bpy.context.scene.frame_set(frame)
-        rootBone = armatureObj.data.bones[animBones[0]]
-        rootPoseBone = armatureObj.pose.bones[animBones[0]]
-
-        # Convert Z-up to Y-up for root translation animation
-        translation = (
-            mathutils.Quaternion((1, 0, 0), math.radians(-90.0))
-            @ (convertTransformMatrix @ rootPoseBone.matrix).decompose()[0]
-        )
-
-        for i in range(3):
-            frameData.append(min(int(round(translation[i])), 2**16 - 1))
+    with ArmaturePoseSampler(armatureObj, anim) as sampler:
+        for frame in range(frame_start, frame_start + frame_count):
+            sampler.setFrame(frame)
 
-        for boneIndex in range(len(animBones)):
-            boneName = animBones[boneIndex]
-            currentBone = armatureObj.data.bones[boneName]
-            currentPoseBone = armatureObj.pose.bones[boneName]
+            # Convert Z-up to Y-up for root translation animation
+            translation = (
+                mathutils.Quaternion((1, 0, 0), math.radians(-90.0))
+                @ (convertTransformMatrix @ sampler.getMatrix(animBones[0])).decompose()[0]
+            )
 
-            rotation = ootGetAnimBoneRot(currentBone, currentPoseBone, convertTransformMatrix, boneIndex == 0)
             for i in range(3):
-                field = rotation.to_euler()[i]
-                value = (math.degrees(field) % 360) / 360
-                frameData.append(min(int(round(value * (2**16 - 1))), 2**16 - 1))
-
-        textureAnimValue = (armatureObj.ootLinkTextureAnim.eyes & 0xF) | (
-            (armatureObj.ootLinkTextureAnim.mouth & 0xF) << 4
-        )
-        frameData.append(textureAnimValue)
+                frameData.append(min(int(round(translation[i])), 2**16 - 1))
+
+            for boneIndex in range(len(animBones)):
+                rotation = ootGetSampledAnimBoneRot(
+                    armatureObj, sampler, animBones[boneIndex], convertTransformMatrix, boneIndex == 0
+                )
+                for i in range(3):
+                    field = rotation.to_euler()[i]
+                    value = (math.degrees(field) % 360) / 360
+                    frameData.append(min(int(round(value * (2**16 - 1))), 2**16 - 1))
+
+            textureAnimValue = (sampler.getIntProperty("ootLinkTextureAnim.eyes") & 0xF) | (
+                (sampler.getIntProperty("ootLinkTextureAnim.mouth") & 0xF) << 4
+            )
+            frameData.append(textureAnimValue)
 
-    bpy.context.scene.frame_set(currentFrame)
     return frameData
 
 
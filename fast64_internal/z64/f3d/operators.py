@@ -16,6 +16,7 @@ from ..model_classes import OOTF3DContext, ootGetIncludedAssetData
 from ..texture_array import ootReadTextureArrays
 from ..model_classes import OOTModel, OOTGfxFormatter
 from ..f3d_writer import ootReadActorScale, writeTextureArraysNew, writeTextureArraysExisting
+from ..o2r import O2RArchiveWriter
 from .properties import OOTDLImportSettings, OOTDLExportSettings
 
 from ..utility import (
@@ -137,41 +138,34 @@ def ootConvertMeshToO2R(
         raise Exception(str(e))
 
     folderPath = os.path.join("objects", folderName)
-    exportFolderPath = os.path.join(exportPath, folderPath)
-    if not os.path.exists(exportFolderPath):
-        os.makedirs(exportFolderPath)
-
-    # dict[Union[FImageKey, FPaletteKey], FImage]
-    for _, fImage in fModel.textures.items():
-        with open(os.path.join(exportFolderPath, fImage.name), "wb") as f:
-            f.write(fImage.toO2R(folderPath))
-
-    # dict[Tuple[bpy.types.Material, str, FAreaData], Tuple[FMaterial, Tuple[int, int]]]
-    for _, (fMaterial, _) in fModel.materials.items():
-        if fMaterial.material is not None:
-            with open(os.path.join(exportFolderPath, fMaterial.material.name), "wb") as f:
-                f.write(fMaterial.material.toO2R(folderPath))
-
-        if fMaterial.revert is not None:
-            with open(os.path.join(exportFolderPath, fMaterial.revert.name), "wb") as f:
-                f.write(fMaterial.revert.toO2R(folderPath))
-
-    # dict[str, FMesh]
-    for name, mesh in fModel.meshes.items():
-        if mesh.draw is not None:
-            meshName = settings.filename if settings.isCustomFilename else mesh.name
-            with open(os.path.join(exportFolderPath, meshName), "wb") as f:
-                f.write(mesh.draw.toO2R(folderPath))
-
-            for triGroup in mesh.triangleGroups:
-                if triGroup.triList is not None:
-                    with open(os.path.join(exportFolderPath, triGroup.triList.name), "wb") as f:
-                        f.write(triGroup.triList.toO2R(folderPath))
-
-                if triGroup.vertexList is not None:
-                    vertexListName = triGroup.vertexList.name
-                    with open(os.path.join(exportFolderPath, vertexListName), "wb") as f:
-                        f.write(triGroup.vertexList.toO2R(folderPath))
+    archivePath = os.path.join(exportPath, (settings.filename if settings.isCustomFilename else name) + ".o2r")
+
+    with O2RArchiveWriter(archivePath) as archive:
+        # dict[Union[FImageKey, FPaletteKey], FImage]
+        for _, fImage in fModel.textures.items():
+            archive.add(folderPath, fImage.name, fImage.toO2R(folderPath))
+
+        # dict[Tuple[bpy.types.Material, str, FAreaData], Tuple[FMaterial, Tuple[int, int]]]
+        for _, (fMaterial, _) in fModel.materials.items():
+            if fMaterial.material is not None:
+                archive.add(folderPath, fMaterial.material.name, fMaterial.material.toO2R(folderPath))
+
+            if fMaterial.revert is not None:
+                archive.add(folderPath, fMaterial.revert.name, fMaterial.revert.toO2R(folderPath))
+
+        # dict[str, FMesh]
+        for name, mesh in fModel.meshes.items():
+            if mesh.draw is not None:
+                meshName = settings.filename if settings.isCustomFilename else mesh.name
+                archive.add(folderPath, meshName, mesh.draw.toO2R(folderPath))
+
+                for triGroup in mesh.triangleGroups:
+                    if triGroup.triList is not None:
+                        archive.add(folderPath, triGroup.triList.name, triGroup.triList.toO2R(folderPath))
+
+                    if triGroup.vertexList is not None:
+                        vertexListName = triGroup.vertexList.name
+                        archive.add(folderPath, vertexListName, triGroup.vertexList.toO2R(folderPath))
 
 class OOT_ImportDL(Operator):
     # set bl_ properties
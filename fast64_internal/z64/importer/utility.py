@@ -2,6 +2,8 @@ import re
 import bpy
 import mathutils
 
+from functools import lru_cache
+
 from ...game_data import game_data
 from ...utility import PluginError, hexOrDecInt, removeComments, yUpToZUp
 from ..actor.properties import Z64_ActorProperty, Z64_ActorHeaderProperty
@@ -64,6 +66,19 @@ def handleActorWithRotAsParam(actorProp: Z64_ActorProperty, actorID: str, rotati
             actorProp.rot_z_custom = hex(rotation[2])
 
 
+# "<type> <name>[<array>] = {" or "<type>* <name>[<array>] = {", the start of any list getDataMatch can look up
+dataDefinitionRegex = re.compile(r"\b([A-Za-z_]\w*)(?:\s*\*+\s*|\s+)([A-Za-z_]\w*)\s*(?:\[[^\[\];=]*\]\s*)?=\s*\{")
+
+
+@lru_cache(maxsize=4)
+def getDataDefinitionIndex(data: str) -> dict[str, list[int]]:
+    """Returns the start offsets (at the type) of the definitions of each name in data, in source order"""
+    index: dict[str, list[int]] = {}
+    for match in dataDefinitionRegex.finditer(data):
+        index.setdefault(match.group(2), []).append(match.start())
+    return index
+
+
 def getDataMatch(
     sceneData: str,
     name: str,
@@ -83,7 +98,17 @@ def getDataMatch(
     elif is_type_known:
         dataTypeRegex = re.escape(dataType)
     regex = rf"{dataTypeRegex}\s*{re.escape(name)}\s*{arrayText}=\s*\{{(.*?)\}}\s*;"
-    match = re.search(regex, sceneData, flags=re.DOTALL)
+    pattern = re.compile(regex, flags=re.DOTALL)
+
+    # Only try the definitions of that name instead of searching the whole file for every list,
+    # if none of them fit the expected layout search the whole file like before
+    match = None
+    for start in getDataDefinitionIndex(sceneData).get(name, []):
+        match = pattern.match(sceneData, start)
+        if match is not None:
+            break
+    if match is None:
+        match = pattern.search(sceneData)
 
     if match is None:
         raise PluginError(f"Could not find {errorMessageID} {name}.")
@@ -115,6 +115,14 @@ class OOTModel(FModel):
     def getDrawLayerV3(self, obj):
         return obj.ootDrawLayer
 
+    def getMaterialContentKey(self, material: bpy.types.Material):
+        for index in range(2):
+            flipbookProp = getattr(material.flipbookGroup, f"flipbook{index}")
+            if usesFlipbook(material, flipbookProp, index, True, ootFlipbookReferenceIsValid):
+                return None
+        contentKey = super().getMaterialContentKey(material)
+        return None if contentKey is None else (contentKey, material.ootMaterial.key())
+
     def getRenderMode(self, drawLayer):
         if self.drawLayerOverride:
             drawLayerUsed = self.drawLayerOverride
@@ -0,0 +1,157 @@
+import os
+import struct
+import time
+import zlib
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from ..utility import PluginError, tempName
+
+
+class O2RArchiveWriter:
+    """
+    Writes resources into a single .o2r (zip) archive instead of one loose file per resource.
+    Resources are deflated in a thread pool (zlib releases the GIL) while the next ones are being serialized,
+    and written to the archive in the order they were added.
+
+    Usage:
+        with O2RArchiveWriter(archivePath) as archive:
+            archive.add(folderPath, name, gfxList.toO2R(folderPath))
+    """
+
+    # limits of the non zip64 format
+    MAX_ENTRIES = 0xFFFF
+    MAX_OFFSET = 0xFFFFFFFF
+
+    def __init__(self, archivePath: str, compressLevel: int = 6, maxWorkers: int | None = None):
+        self.archivePath = archivePath
+        self.compressLevel = compressLevel
+        self.maxWorkers = maxWorkers if maxWorkers is not None else min(8, os.cpu_count() or 1)
+        self.pending: deque[tuple[str, Future]] = deque()
+        # resource path : (encoded name, crc, compressed size, size, offset)
+        self.entries: dict[str, tuple[bytes, int, int, int, int]] = {}
+
+        localTime = time.localtime()
+        self.dosTime = (localTime.tm_hour << 11) | (localTime.tm_min << 5) | (localTime.tm_sec // 2)
+        self.dosDate = ((max(localTime.tm_year, 1980) - 1980) << 9) | (localTime.tm_mon << 5) | localTime.tm_mday
+
+        self.tempPath = None
+        self.file = None
+        self.executor = None
+
+    def __enter__(self):
+        archiveDir = os.path.dirname(self.archivePath)
+        if archiveDir and not os.path.exists(archiveDir):
+            os.makedirs(archiveDir)
+        # Written next to the archive and moved over it once complete, so a failed export keeps the previous archive
+        self.tempPath = tempName(self.archivePath)
+        self.file = open(self.tempPath, "wb")
+        self.executor = ThreadPoolExecutor(max_workers=self.maxWorkers)
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        try:
+            try:
+                if excType is None:
+                    self.flush()
+                    self.writeCentralDirectory()
+            finally:
+                self.executor.shutdown(wait=True, cancel_futures=True)
+                self.file.close()
+            if excType is None:
+                os.replace(self.tempPath, self.archivePath)
+        finally:
+            if os.path.exists(self.tempPath):
+                os.remove(self.tempPath)
+
+    def add(self, folderPath: str, name: str, data: bytes | bytearray):
+        # Archive paths always use forward slashes, and must match the paths hashed in toO2R
+        resourcePath = os.path.join(folderPath, name).replace("\\", "/")
+        self.pending.append((resourcePath, self.executor.submit(self.compress, bytes(data))))
+
+        # Write out whatever is already done, without waiting on the pool
+        while len(self.pending) > 0 and self.pending[0][1].done():
+            self.writeEntry(*self.pending.popleft())
+
+    def compress(self, data: bytes):
+        compressor = zlib.compressobj(self.compressLevel, zlib.DEFLATED, -zlib.MAX_WBITS)
+        compressed = compressor.compress(data) + compressor.flush()
+        return zlib.crc32(data), len(data), compressed
+
+    def flush(self):
+        while len(self.pending) > 0:
+            self.writeEntry(*self.pending.popleft())
+
+    def writeEntry(self, resourcePath: str, future: Future):
+        crc, size, compressed = future.result()
+        offset = self.file.tell()
+        if len(self.entries) >= self.MAX_ENTRIES or offset + len(compressed) > self.MAX_OFFSET:
+            raise PluginError(f"Too much data for a single archive: {self.archivePath}")
+
+        encodedName = resourcePath.encode("utf-8")
+        self.file.write(
+            struct.pack(
+                "<IHHHHHIIIHH",
+                0x04034B50,  # local file header signature
+                20,  # version needed to extract
+                0x800,  # flags: utf-8 file name
+                zlib.DEFLATED,
+                self.dosTime,
+                self.dosDate,
+                crc,
+                len(compressed),
+                size,
+                len(encodedName),
+                0,  # extra field length
+            )
+        )
+        self.file.write(encodedName)
+        self.file.write(compressed)
+        # Like overwriting a loose file, a resource written twice keeps its last data.
+        # The earlier copy stays in the file but is no longer referenced by the central directory.
+        self.entries.pop(resourcePath, None)
+        self.entries[resourcePath] = (encodedName, crc, len(compressed), size, offset)
+
+    def writeCentralDirectory(self):
+        centralDirOffset = self.file.tell()
+        for encodedName, crc, compressedSize, size, offset in self.entries.values():
+            self.file.write(
+                struct.pack(
+                    "<IHHHHHHIIIHHHHHII",
+                    0x02014B50,  # central directory header signature
+                    20,  # version made by
+                    20,  # version needed to extract
+                    0x800,  # flags: utf-8 file name
+                    zlib.DEFLATED,
+                    self.dosTime,
+                    self.dosDate,
+                    crc,
+                    compressedSize,
+                    size,
+                    len(encodedName),
+                    0,  # extra field length
+                    0,  # file comment length
+                    0,  # disk number start
+                    0,  # internal file attributes
+                    0,  # external file attributes
+                    offset,
+                )
+            )
+            self.file.write(encodedName)
+        centralDirSize = self.file.tell() - centralDirOffset
+        if self.file.tell() > self.MAX_OFFSET:
+            raise PluginError(f"Too much data for a single archive: {self.archivePath}")
+
+        self.file.write(
+            struct.pack(
+                "<IHHHHIIH",
+                0x06054B50,  # end of central directory signature
+                0,  # number of this disk
+                0,  # disk where central directory starts
+                len(self.entries),
+                len(self.entries),
+                centralDirSize,
+                centralDirOffset,
+                0,  # comment length
+            )
+        )
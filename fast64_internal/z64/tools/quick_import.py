@@ -1,5 +1,3 @@
-import os
-import re
 import bpy
 
 from pathlib import Path
@@ -8,6 +6,7 @@ from ..f3d.properties import OOTDLImportSettings
 from ..skeleton.properties import OOTSkeletonImportSettings
 from ..animation.properties import OOTAnimImportSettingsProperty
 from ..cutscene.importer import importCutsceneData
+from .symbol_index import DecompSymbolIndex, get_symbol_index
 
 
 class QuickImportAborted(Exception):
@@ -16,30 +15,12 @@ class QuickImportAborted(Exception):
         self.message = message
 
 
-def get_found_defs(path: Path, sym_name: str, sym_def_pattern: re.Pattern[str]):
-    all_found_defs: dict[Path, list[tuple[str, str]]] = dict()
-
-    for dirpath, _, filenames in os.walk(path):
-        dirpath_p = Path(dirpath)
-
-        for filename in filenames:
-            file_p = dirpath_p / filename
-
-            # Only look into C files
-            if file_p.suffix != ".c":
-                continue
+def get_found_defs(symbol_index: DecompSymbolIndex, path: Path, sym_name: str):
+    symbol_index.refresh(path)
+    all_found_defs = symbol_index.find_defs(path, sym_name)
 
-            source = file_p.read_text()
-
-            # Simple check to see if we should look into this file any further
-            if sym_name not in source:
-                continue
-
-            found_defs = sym_def_pattern.findall(source)
-
-            if len(found_defs) > 0:
-                print(file_p, f"{found_defs=}")
-                all_found_defs[file_p] = found_defs
+    for file_p, found_defs in all_found_defs.items():
+        print(file_p, f"{found_defs=}")
 
     return all_found_defs
 
@@ -62,8 +43,6 @@ def quick_import_exec(context: bpy.types.Context, sym_name: str):
     ):
         raise QuickImportAborted("Symbol names only have characters a-zA-Z0-9_")
 
-    sym_def_pattern = re.compile(rf"([^\s]+)\s+{sym_name}\s*(\[[^\]]*\])?\s*=")
-
     all_found_defs: dict[Path, list[tuple[str, str]]] = dict()
     found_dir_p: Optional[Path] = None
     base_dir_p = Path(context.scene.ootDecompPath)
@@ -80,12 +59,16 @@ def quick_import_exec(context: bpy.types.Context, sym_name: str):
         base_dir_p / "src" / "overlays" / "actors",
     ]
 
-    for path in assets_paths:
-        all_found_defs = get_found_defs(path, sym_name, sym_def_pattern)
+    symbol_index = get_symbol_index(base_dir_p)
+    try:
+        for path in assets_paths:
+            all_found_defs = get_found_defs(symbol_index, path, sym_name)
 
-        if len(all_found_defs) > 0:
-            found_dir_p = path
-            break
+            if len(all_found_defs) > 0:
+                found_dir_p = path
+                break
+    finally:
+        symbol_index.save()
 
     assert found_dir_p is not None
 
@@ -0,0 +1,132 @@
+import os
+import re
+import json
+import hashlib
+import bpy
+
+from pathlib import Path
+from typing import Optional
+
+
+# Same as the pattern quick import used to search for a single symbol: "<type> <name>[<array>] ="
+SYM_DEF_PATTERN = re.compile(r"([^\s]+)\s+(\w+)\s*(\[[^\]]*\])?\s*=")
+
+
+class DecompSymbolIndex:
+    """
+    Persistent index of the symbols defined in the .c files of a decomp folder.
+    Each file is only read again when its mtime or size changes,
+    so lookups don't need to read the whole decomp every time.
+    """
+
+    VERSION = 2
+
+    def __init__(self, base_dir: Path):
+        self.base_dir = base_dir
+        # relative file path : {"mtime": int, "size": int, "defs": [[name, type, array decl], ...]}
+        self.files: dict[str, dict] = {}
+        # symbol name : [(relative file path, type, array decl), ...], rebuilt when files change
+        self.symbols: Optional[dict[str, list[tuple[str, str, str]]]] = None
+        self.dirty = False
+
+        path_hash = hashlib.sha1(str(base_dir.resolve()).encode("utf-8")).hexdigest()[:16]
+        cache_dir = Path(bpy.utils.user_resource("DATAFILES", path="fast64", create=True))
+        self.cache_path = cache_dir / f"symbol_index_{path_hash}.json"
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.cache_path, "r") as cache_file:
+                data = json.load(cache_file)
+            if data.get("version") == DecompSymbolIndex.VERSION and data.get("base_dir") == str(self.base_dir):
+                self.files = data["files"]
+        except (OSError, ValueError, KeyError):
+            self.files = {}
+
+    def save(self):
+        if not self.dirty:
+            return
+        try:
+            with open(self.cache_path, "w") as cache_file:
+                json.dump(
+                    {"version": DecompSymbolIndex.VERSION, "base_dir": str(self.base_dir), "files": self.files},
+                    cache_file,
+                )
+            self.dirty = False
+        except OSError as e:
+            print(f"Could not save the symbol index to {self.cache_path}: {e}")
+
+    def get_key(self, path: Path):
+        return Path(os.path.relpath(path, self.base_dir)).as_posix()
+
+    def get_prefix(self, path: Path):
+        key = self.get_key(path)
+        return "" if key == "." else key + "/"
+
+    def refresh(self, path: Path):
+        """Index new and modified .c files in path, and forget about deleted ones"""
+        seen_files: set[str] = set()
+
+        for dirpath, _, filenames in os.walk(path):
+            dirpath_p = Path(dirpath)
+
+            for filename in filenames:
+                file_p = dirpath_p / filename
+
+                # Only look into C files
+                if file_p.suffix != ".c":
+                    continue
+
+                key = self.get_key(file_p)
+                seen_files.add(key)
+                stat = file_p.stat()
+                entry = self.files.get(key)
+                if entry is not None and entry["mtime"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+                    continue
+
+                source = file_p.read_text()
+                self.files[key] = {
+                    "mtime": stat.st_mtime_ns,
+                    "size": stat.st_size,
+                    "defs": [
+                        [match.group(2), match.group(1), match.group(3) or ""]
+                        for match in SYM_DEF_PATTERN.finditer(source)
+                    ],
+                }
+                self.dirty = True
+                self.symbols = None
+
+        prefix = self.get_prefix(path)
+        for key in [key for key in self.files.keys() if key.startswith(prefix) and key not in seen_files]:
+            del self.files[key]
+            self.dirty = True
+            self.symbols = None
+
+    def get_symbols(self):
+        if self.symbols is None:
+            self.symbols = {}
+            for key, entry in self.files.items():
+                for name, sym_type, array_decl in entry["defs"]:
+                    self.symbols.setdefault(name, []).append((key, sym_type, array_decl))
+        return self.symbols
+
+    def find_defs(self, path: Path, sym_name: str):
+        """Returns the definitions of sym_name in the files of path, as {file: [(type, array decl), ...]}"""
+        prefix = self.get_prefix(path)
+        found_defs: dict[Path, list[tuple[str, str]]] = dict()
+
+        for key, sym_type, array_decl in self.get_symbols().get(sym_name, []):
+            if key.startswith(prefix):
+                found_defs.setdefault(self.base_dir / key, []).append((sym_type, array_decl))
+
+        return found_defs
+
+
+# base dir : index, kept for the whole session
+symbol_indices: dict[Path, DecompSymbolIndex] = {}
+
+
+def get_symbol_index(base_dir: Path):
+    if base_dir not in symbol_indices:
+        symbol_indices[base_dir] = DecompSymbolIndex(base_dir)
+    return symbol_indices[base_dir]